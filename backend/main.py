@@ -2,20 +2,25 @@
 FastAPI application for meeting summarization.
 """
 import os
-from typing import Optional
+from typing import List, Optional
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 
-from pipeline import run_pipeline_async
+from pipeline import run_pipeline_async, run_pipelines_async
 from models import PipelineResponse
 from utils.supabase_client import create_meeting_record
+from stages.common import close_http_client
+from utils.logging_setup import configure_logging, shutdown_logging
 from datetime import datetime
 
 # Load environment variables
 load_dotenv()
 
+# Queue-backed logging: records are written to stderr off the event loop
+configure_logging()
+
 # Create FastAPI app
 app = FastAPI(
     title="Meeting Summarizer API",
@@ -46,6 +51,13 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Release pooled outbound connections and flush queued logs."""
+    await close_http_client()
+    shutdown_logging()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -55,6 +67,7 @@ async def root():
         "endpoints": {
             "health": "/health",
             "summarize": "/summarize (POST)",
+            "summarize_batch": "/summarize/batch (POST)",
             "docs": "/docs",
             "redoc": "/redoc"
         }
@@ -161,6 +174,66 @@ async def summarize_meeting(
         )
 
 
+# Server-side caps for /summarize/batch so one request can't flood Azure
+BATCH_MAX_FILES = 20
+BATCH_MAX_CONCURRENCY = 8
+
+
+@app.post("/summarize/batch")
+async def summarize_meetings_batch(
+    files: List[UploadFile] = File(..., description="VTT transcript files"),
+    model: Optional[str] = Form(None, description="Model name (optional)"),
+    max_concurrency: int = Form(BATCH_MAX_CONCURRENCY, description=f"Maximum meetings processed at once (capped at {BATCH_MAX_CONCURRENCY})")
+):
+    """
+    Summarize several VTT transcripts concurrently.
+
+    Meetings are fanned out over the shared LLM client instead of being
+    processed one after another. Results are not saved to the database.
+
+    Returns:
+        {"results": [...]} with one entry per file, in upload order. Failed
+        meetings are reported as {"filename", "error"} without failing the batch.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BATCH_MAX_FILES} files can be summarized per batch"
+        )
+
+    for file in files:
+        if not file.filename.endswith(".vtt"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File must be a .vtt transcript file: {file.filename}"
+            )
+
+    try:
+        vtt_contents = [(await file.read()).decode("utf-8") for file in files]
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=400,
+            detail="Files must be UTF-8 encoded"
+        )
+
+    outcomes = await run_pipelines_async(
+        vtt_contents,
+        model=model,
+        max_concurrency=min(max(1, max_concurrency), BATCH_MAX_CONCURRENCY)
+    )
+
+    results = []
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, Exception):
+            results.append({"filename": file.filename, "error": str(outcome)})
+        elif "error" in outcome:
+            results.append({"filename": file.filename, "error": outcome["error"]})
+        else:
+            results.append(outcome)
+
+    return JSONResponse(content={"results": results})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,33 @@
+-- =====================================================
+-- PROJECT STATS AGGREGATION
+-- =====================================================
+-- get_project_stats used to download every completed meeting's
+-- summary_json and count action items in Python.
+--
+-- Solution: Aggregate on the server and return three integers.
+-- Runs as the caller (SECURITY INVOKER) so existing RLS policies apply.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION public.project_stats(p_id uuid)
+RETURNS TABLE (meetings_count int, tasks_count int, tasks_done int) AS $$
+  SELECT
+    (SELECT count(*)::int FROM meetings WHERE project_id = p_id),
+    COALESCE(sum(jsonb_array_length(COALESCE(ms.summary_json->'action_items', '[]'::jsonb))), 0)::int,
+    COALESCE(sum((
+      SELECT count(*)
+      FROM jsonb_array_elements(COALESCE(ms.summary_json->'action_items', '[]'::jsonb)) ai
+      WHERE ai->>'status' = 'done'
+    )), 0)::int
+  FROM meetings m
+  JOIN meeting_summaries ms ON ms.meeting_id = m.id
+  WHERE m.project_id = p_id
+    AND m.status = 'completed';
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.project_stats(uuid) TO authenticated;
+
+-- =====================================================
+-- VERIFICATION
+-- =====================================================
+-- SELECT * FROM project_stats('<project-uuid>');
+-- =====================================================
@@ -12,6 +12,9 @@ Total API calls: 4 per meeting (optimal balance between quality and cost)
 from __future__ import annotations
 
 import asyncio
+import logging
+import re
+from collections import Counter
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -20,8 +23,11 @@ from stages.stage1_foundation import run_foundation_stage_async
 from stages.stage2_extraction import run_extraction_stage_async
 from stages.stage3_synthesis import run_synthesis_stage_async
 from stages.stage4_mindmap import build_mindmap_async
+from stages.common import SMALL_MEETING_MODEL, SMALL_MEETING_MAX_CHARS, _to_int
 from utils.supabase_client import save_meeting_results, update_meeting_details
 
+logger = logging.getLogger(__name__)
+
 CONFIDENCE_KEYWORDS = {
     "very high": 0.95,
     "high": 0.9,
@@ -59,6 +65,14 @@ def _shorten_title(value: Any, max_words: int = 8) -> str:
 
 
 def _normalize_confidence(value: Any, default: float = 0.7) -> float:
+    # Fast paths: the model almost always returns a float in [0, 1] or an
+    # exact lowercase keyword
+    value_type = type(value)
+    if value_type is float and 0.0 <= value <= 1.0:
+        return value
+    if value_type is str and value in CONFIDENCE_KEYWORDS:
+        return CONFIDENCE_KEYWORDS[value]
+
     if isinstance(value, (int, float)):
         numeric = float(value)
     elif isinstance(value, str):
@@ -82,17 +96,73 @@ def _normalize_confidence(value: Any, default: float = 0.7) -> float:
     return max(0.0, min(numeric, 1.0))
 
 
-def _format_timestamp_ms(ms: Any) -> str:
-    try:
-        ms_int = int(float(ms))
-    except (TypeError, ValueError):
-        return ""
+def _pick_model(utterances: List[Dict[str, Any]], model: Optional[str]) -> Optional[str]:
+    """Route short transcripts to SMALL_MEETING_MODEL when no model was requested."""
+    if model or not SMALL_MEETING_MODEL:
+        return model
+    transcript_chars = sum(len(str(u.get("text", ""))) for u in utterances)
+    if transcript_chars <= SMALL_MEETING_MAX_CHARS:
+        return SMALL_MEETING_MODEL
+    return model
+
+
+# Shortest model-provided name that may be matched as a prefix of a speaker's
+SPEAKER_PREFIX_MIN_CHARS = 3
+
+
+def _resolve_speaker(name: Any, known_speakers: Dict[str, str]) -> Optional[str]:
+    """
+    Map a model-provided name onto a transcript speaker.
+
+    Tries an exact case-insensitive match, then a unique whole-word prefix
+    match ("Alice" -> "Alice Smith"). Every token the model gave must match
+    the speaker's leading tokens, so "Alice Jones" never becomes "Alice Smith"
+    and "Speaker 2" never becomes "Speaker 1". Returns None when nothing or
+    more than one speaker matches.
+    """
+    key = " ".join(str(name or "").lower().split())
+    if not key:
+        return None
+    if key in known_speakers:
+        return known_speakers[key]
+    if len(key) < SPEAKER_PREFIX_MIN_CHARS:
+        return None
+
+    tokens = key.split()
+    matches = [
+        speaker for lowered, speaker in known_speakers.items()
+        if lowered.split()[:len(tokens)] == tokens
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+# Recordings this small (debug uploads, silence) skip the LLM stages entirely
+BRIEF_MEETING_MIN_UTTERANCES = 5
+BRIEF_MEETING_MIN_DURATION_MS = 60_000
+
 
-    seconds_total = ms_int // 1000
-    seconds = seconds_total % 60
-    minutes = (seconds_total // 60) % 60
-    hours = seconds_total // 3600
-    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+def _is_brief_meeting(utterances: List[Dict[str, Any]], duration_ms: int) -> bool:
+    """True when a transcript is too small to be worth an LLM analysis."""
+    return len(utterances) < BRIEF_MEETING_MIN_UTTERANCES or duration_ms < BRIEF_MEETING_MIN_DURATION_MS
+
+
+def _brief_meeting_summary(
+    utterances: List[Dict[str, Any]], participants: List[str], duration_ms: int
+) -> str:
+    """Deterministic narrative for brief meetings: an overview plus the transcript itself."""
+    speakers = ", ".join(participants) or "unidentified speakers"
+    lines = [
+        "## Executive Overview",
+        f"A brief recording of {len(utterances)} utterance(s) over {duration_ms // 1000} seconds "
+        f"with {speakers}. It was too short for a full analysis, so the transcript is reproduced below.",
+        "",
+        "## Transcript",
+    ]
+    lines.extend(
+        f"- **{_clean_text(u.get('speaker'), 'Speaker ?')}**: {_clean_text(u.get('text'))}"
+        for u in utterances
+    )
+    return "\n".join(lines)
 
 
 def _normalize_evidence(evidence_data: Any) -> Dict[str, str]:
@@ -119,26 +189,28 @@ def _normalize_evidence(evidence_data: Any) -> Dict[str, str]:
     return {"speaker": "", "quote": ""}
 
 
+# Section titles the model emits without markdown, keyed by lowercase text
+_SECTION_HEADINGS = {
+    title.lower(): f"## {title}"
+    for title in (
+        "Executive Summary",
+        "Meeting Overview",
+        "Key Discussion Topics",
+        "Key Takeaways",
+        "Decisions Made",
+        "Concerns & Challenges",
+        "Risks & Challenges",
+        "Next Steps",
+    )
+}
+_BARE_SECTION_TITLES = frozenset({"Key Topics", "Summary", "Highlights"})
+
+
 def _ensure_markdown_headings(text: str) -> str:
     if not text:
         return ""
 
     text = text.replace("\\r\\n", "\n").replace("\\n", "\n")
-    replacements = {
-        "Executive Summary": "## Executive Summary",
-        "Meeting Overview": "## Meeting Overview",
-        "Key Discussion Topics": "## Key Discussion Topics",
-        "Decisions Made": "## Decisions Made",
-        "Concerns & Challenges": "## Concerns & Challenges",
-        "Risks & Challenges": "## Risks & Challenges",
-        "Next Steps": "## Next Steps",
-        "Executive Summary": "## Executive Summary",
-        "Key Takeaways": "## Key Takeaways",
-        "Key Discussion Topics": "## Key Discussion Topics",
-        "Decisions Made": "## Decisions Made",
-        "Concerns & Challenges": "## Concerns & Challenges",
-        "Meeting Overview": "## Meeting Overview"
-    }
 
     normalized = text.replace("\r\n", "\n").replace("\r", "\n")
     lines = normalized.split("\n")
@@ -156,20 +228,11 @@ def _ensure_markdown_headings(text: str) -> str:
             stripped = inner
             lines[idx] = inner
 
-        if stripped in replacements and not stripped.startswith("#"):
-            lines[idx] = replacements[stripped]
-            continue
-
-        lowered = stripped.lower()
-        for key, heading in replacements.items():
-            if lowered == key.lower():
-                lines[idx] = heading
-                break
-        else:
-            if stripped.startswith("##"):
-                continue
-            if stripped in {"Key Topics", "Summary", "Highlights"}:
-                lines[idx] = f"## {stripped}"
+        heading = _SECTION_HEADINGS.get(stripped.lower())
+        if heading:
+            lines[idx] = heading
+        elif stripped in _BARE_SECTION_TITLES:
+            lines[idx] = f"## {stripped}"
 
     if first_content_idx is not None:
         first_line = lines[first_content_idx].strip()
@@ -344,13 +407,6 @@ def _normalize_chapters(items: Any) -> List[Dict[str, Any]]:
     return normalized
 
 
-def _to_int(value: Any, default: int = 0) -> int:
-    try:
-        return int(float(value))
-    except (TypeError, ValueError):
-        return default
-
-
 def _normalize_timeline(items: Any) -> List[Dict[str, Any]]:
     normalized: List[Dict[str, Any]] = []
     if not isinstance(items, list):
@@ -393,6 +449,21 @@ HAT_NARRATIVE = {
 }
 
 
+_TIMESTAMP_RE = re.compile(r'\(\d{2}:\d{2}:\d{2}(?:–\d{2}:\d{2}:\d{2})?\)')
+
+# Section headers for content that must not leak into the narrative summary
+_EXCLUDED_HEADER_RE = re.compile(
+    r'#+\s*six thinking hats'
+    r'|\*\*six thinking hats'
+    r'|#+\s*chapters\s*$'
+    r'|\*\*chapters\*\*'
+    r'|#+\s*action items'
+    r'|\*\*action items\*\*'
+    r'|#+\s*decisions made'
+    r'|\*\*decisions made\*\*'
+)
+
+
 def _sanitize_narrative_summary(text: str) -> str:
     """
     Remove any extra sections (Six Thinking Hats, Chapters, JSON dumps, etc.)
@@ -404,10 +475,8 @@ def _sanitize_narrative_summary(text: str) -> str:
     if not text:
         return ""
 
-    import re
-
     # Remove timestamp patterns: (HH:MM:SS) or (HH:MM:SS–HH:MM:SS)
-    text = re.sub(r'\(\d{2}:\d{2}:\d{2}(?:–\d{2}:\d{2}:\d{2})?\)', '', text)
+    text = _TIMESTAMP_RE.sub('', text)
 
     cleaned = text.replace("\r", "\n")
     
@@ -433,17 +502,6 @@ def _sanitize_narrative_summary(text: str) -> str:
     # Remove lines that are clearly section headers for excluded content
     # Only match if the line IS a header (starts with ** or ## or is standalone)
     lines = []
-    excluded_header_patterns = [
-        r'^#+\s*six thinking hats',
-        r'^\*\*six thinking hats',
-        r'^#+\s*chapters\s*$',
-        r'^\*\*chapters\*\*',
-        r'^#+\s*action items',
-        r'^\*\*action items\*\*',
-        r'^#+\s*decisions made',
-        r'^\*\*decisions made\*\*',
-    ]
-    
     for line in cleaned.splitlines():
         stripped = line.strip().lower()
         if not stripped:
@@ -451,8 +509,7 @@ def _sanitize_narrative_summary(text: str) -> str:
             continue
         
         # Check if this line is an excluded header
-        is_excluded = any(re.match(pattern, stripped) for pattern in excluded_header_patterns)
-        if is_excluded:
+        if _EXCLUDED_HEADER_RE.match(stripped):
             break  # Stop processing at excluded headers
             
         lines.append(line)
@@ -521,6 +578,10 @@ async def run_pipeline_async(
 
     Total API calls: 4 per meeting (optimal balance between quality and cost)
 
+    Brief meetings (fewer than BRIEF_MEETING_MIN_UTTERANCES utterances or
+    shorter than BRIEF_MEETING_MIN_DURATION_MS) skip Stages 1-3 and make no
+    API calls: the summary is built deterministically from the transcript.
+
     Args:
         vtt_content: VTT file content as string
         model: Model name (optional, uses env default)
@@ -555,17 +616,15 @@ async def run_pipeline_async(
     import time
     pipeline_start = time.time()
 
-    print("\n" + "=" * 70)
-    print("[PIPELINE] Starting 3-STAGE pipeline execution")
-    print("=" * 70)
+    logger.info("Starting 3-stage pipeline execution")
 
     # Step 1: Parse VTT
-    print("[PIPELINE] Step 1: Parsing VTT file...")
+    logger.info("Step 1: Parsing VTT file...")
     utterances = parse_vtt(vtt_content)
-    print(f"[PIPELINE] Parsed {len(utterances)} utterances")
+    logger.info("Parsed %d utterances", len(utterances))
 
     if not utterances:
-        print("[PIPELINE] ERROR: No utterances found in VTT file")
+        logger.error("No utterances found in VTT file")
         return {
             "error": "No utterances found in VTT file",
             "meeting_details": {
@@ -593,27 +652,44 @@ async def run_pipeline_async(
 
     # Deterministic metadata derived from transcript
     duration_ms = int(utterances[-1]["end_ms"])
-    speakers = [str(u.get("speaker", "")).strip() for u in utterances]
-    participants = sorted({s for s in speakers if s and s != "Speaker ?"})
-    unknown_count = sum(1 for s in speakers if s == "Speaker ?")
+    # Normalize and tally speaker names in a single pass over the transcript
+    speaker_counts = Counter(str(u.get("speaker", "")).strip() for u in utterances)
+    unknown_count = speaker_counts.pop("Speaker ?", 0)
+    speaker_counts.pop("", None)
+    participants = sorted(speaker_counts)
 
-    print(f"[PIPELINE] Meeting duration: {duration_ms}ms")
-    print(f"[PIPELINE] Participants: {len(participants)}, Unknown speakers: {unknown_count}")
+    logger.info("Meeting duration: %dms", duration_ms)
+    logger.info("Participants: %d, Unknown speakers: %d", len(participants), unknown_count)
+
+    brief = _is_brief_meeting(utterances, duration_ms)
+    if brief:
+        logger.info("Brief meeting: skipping LLM stages")
+
+    routed_model = _pick_model(utterances, model)
+    if routed_model != model and not brief:
+        logger.info("Short meeting: routing all stages to %s", routed_model)
+        model = routed_model
 
     try:
         # Stage 1: Foundation - Extract structure
-        print("\n[PIPELINE] Step 2: Stage 1 - Foundation (metadata, timeline, chapters)")
-        stage1_result = await run_foundation_stage_async(utterances, model)
-        print("[PIPELINE] Stage 1 complete!")
+        if brief:
+            stage1_result = {}
+        else:
+            logger.info("Step 2: Stage 1 - Foundation (metadata, timeline, chapters)")
+            stage1_result = await run_foundation_stage_async(utterances, model)
+            logger.info("Stage 1 complete!")
 
         meeting_details_raw = stage1_result.get("meeting_details", {}) or {}
         timeline = _normalize_timeline(stage1_result.get("timeline", []))
         chapters_foundation = stage1_result.get("chapters", [])
 
         # Stage 2: Extraction - Extract action items, achievements, blockers, hats
-        print("\n[PIPELINE] Step 3: Stage 2 - Extraction (action items, achievements, blockers, hats)")
-        stage2_result = await run_extraction_stage_async(utterances, chapters_foundation, model)
-        print("[PIPELINE] Stage 2 complete!")
+        if brief:
+            stage2_result = {}
+        else:
+            logger.info("Step 3: Stage 2 - Extraction (action items, achievements, blockers, hats)")
+            stage2_result = await run_extraction_stage_async(utterances, chapters_foundation, model)
+            logger.info("Stage 2 complete!")
 
         action_items = _normalize_action_items(stage2_result.get("action_items", []))
         achievements = _normalize_achievements(stage2_result.get("achievements", []))
@@ -624,12 +700,18 @@ async def run_pipeline_async(
         divergent_points = stage2_result.get("divergent_points", []) or []
 
         # Stage 3: Synthesis - Generate narrative summaries
-        print("\n[PIPELINE] Step 4: Stage 3 - Synthesis (narrative summary, chapter summaries)")
-        stage3_result = await run_synthesis_stage_async(
-            utterances, chapters_foundation, action_items, achievements, blockers,
-            six_thinking_hats, tone, convergent_points, divergent_points, model
-        )
-        print("[PIPELINE] Stage 3 complete!")
+        if brief:
+            stage3_result = {
+                "narrative_summary": _brief_meeting_summary(utterances, participants, duration_ms),
+                "chapters": [],
+            }
+        else:
+            logger.info("Step 4: Stage 3 - Synthesis (narrative summary, chapter summaries)")
+            stage3_result = await run_synthesis_stage_async(
+                utterances, chapters_foundation, action_items, achievements, blockers,
+                six_thinking_hats, tone, convergent_points, divergent_points, model
+            )
+            logger.info("Stage 3 complete!")
 
         narrative_summary_raw = stage3_result.get("narrative_summary", "")
         narrative_summary = _ensure_markdown_headings(
@@ -656,9 +738,17 @@ async def run_pipeline_async(
 
         hats: List[Dict[str, Any]] = []
         if isinstance(six_thinking_hats, dict):
+            # Hats must reference a real transcript speaker; resolve shortened
+            # names and drop invented ones (e.g. "PersonName")
+            known_speakers = {p.lower(): p for p in participants}
+            hat_speakers = set()
             for participant, hats_data in six_thinking_hats.items():
                 if not isinstance(hats_data, dict):
                     continue
+                participant = _resolve_speaker(participant, known_speakers)
+                if participant is None or participant in hat_speakers:
+                    continue
+                hat_speakers.add(participant)
 
                 # New simplified structure: dominant_hat + explanation from Stage 2
                 dominant_hat = hats_data.get("dominant_hat", "white")
@@ -681,21 +771,21 @@ async def run_pipeline_async(
 
         stage3_time = time.time() - pipeline_start
 
-        print("[PIPELINE] ✓ 3-stage analysis complete!")
-        print(f"  - Meeting: {meeting_details['title']}")
-        print(f"  - Action Items: {len(action_items)}")
-        print(f"  - Achievements: {len(achievements)}")
-        print(f"  - Blockers: {len(blockers)}")
-        print(f"  - Six Thinking Hats: {len(hats)} participants")
-        print(f"  - Chapters: {len(chapters)}")
-        print(f"  - Timeline: {len(timeline)} key moments")
-        print(f"  - Total time: {stage3_time:.2f}s")
+        logger.info(
+            "3-stage analysis complete in %.2fs: meeting=%r, action items=%d, achievements=%d, "
+            "blockers=%d, hats=%d participants, chapters=%d, timeline=%d key moments",
+            stage3_time,
+            meeting_details["title"],
+            len(action_items),
+            len(achievements),
+            len(blockers),
+            len(hats),
+            len(chapters),
+            len(timeline),
+        )
 
     except Exception as exc:  # noqa: BLE001
-        print(f"[PIPELINE] ERROR in 3-stage analysis: {exc}")
-        import traceback
-
-        traceback.print_exc()
+        logger.exception("3-stage analysis failed: %s", exc)
         return {
             "error": f"3-stage analysis failed: {exc}",
             "meeting_details": {
@@ -722,7 +812,7 @@ async def run_pipeline_async(
         }
 
     # Step 5: Build mindmap (optional, depends on chapters and summary)
-    print("\n[PIPELINE] Step 5: Stage 4 - Mindmap (visualization)")
+    logger.info("Step 5: Stage 4 - Mindmap (visualization)")
     try:
         mindmap = await build_mindmap_async(
             meeting_details=meeting_details,
@@ -732,12 +822,13 @@ async def run_pipeline_async(
             timeline=timeline,
             hats=hats,
         )
-        print(
-            "[PIPELINE] ✓ Mindmap complete. "
-            f"Nodes: {len(mindmap.get('nodes', []))}, Edges: {len(mindmap.get('edges', []))}"
+        logger.info(
+            "Mindmap complete. Nodes: %d, Edges: %d",
+            len(mindmap.get("nodes", [])),
+            len(mindmap.get("edges", [])),
         )
     except Exception as exc:  # noqa: BLE001
-        print(f"[PIPELINE] Warning: Mindmap generation failed: {exc}")
+        logger.warning("Mindmap generation failed: %s", exc)
         mindmap = {
             "center_node": {"id": "root", "label": meeting_details["title"], "type": "root"},
             "nodes": [],
@@ -746,22 +837,22 @@ async def run_pipeline_async(
 
     total_time = time.time() - pipeline_start
 
-    print("\n" + "=" * 70)
-    print(f"[PIPELINE] ✓ Pipeline execution complete in {total_time:.2f}s")
-    print("[PIPELINE] Total API calls: 4 (Stage 1-3 + mindmap)")
-    print("=" * 70 + "\n")
+    logger.info(
+        "Pipeline execution complete in %.2fs. Total API calls: %s",
+        total_time,
+        "0 (brief meeting, LLM stages skipped)" if brief else "4 (Stage 1-3 + mindmap)",
+    )
 
     # Save to Supabase if meeting_id is provided (MUST be before return!)
     if meeting_id:
-        print(f"[PIPELINE] Saving results to Supabase for meeting {meeting_id}...")
+        logger.info("Saving results to Supabase for meeting %s...", meeting_id)
         try:
-            # Update meeting details including timeline
+            # Update meeting details (timeline is written by save_meeting_results)
             await update_meeting_details(
                 meeting_id,
                 meeting_details["title"],
                 meeting_details["duration_ms"],
-                meeting_details["participants"],
-                timeline_json=timeline  # Save timeline to meetings table
+                meeting_details["participants"]
             )
             # Save analysis results to meeting_summaries table
             await save_meeting_results(
@@ -772,11 +863,9 @@ async def run_pipeline_async(
                 hats,
                 timeline=timeline
             )
-            print("[PIPELINE] ✓ Saved to Supabase successfully!")
+            logger.info("Saved to Supabase successfully!")
         except Exception as e:
-            print(f"[PIPELINE] Error saving to Supabase: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error saving to Supabase: %s", e)
 
     return {
         "meeting_details": meeting_details,
@@ -787,3 +876,30 @@ async def run_pipeline_async(
         "mindmap": mindmap,
     }
 
+
+async def run_pipelines_async(
+    vtt_contents: List[str],
+    model: Optional[str] = None,
+    max_concurrency: int = 8,
+) -> List[Any]:
+    """
+    Run the pipeline for several transcripts concurrently.
+
+    Each meeting's stages stay sequential (every stage depends on the
+    previous one), but independent meetings overlap their LLM round-trips.
+    At most `max_concurrency` pipelines are in flight at once.
+
+    Returns:
+        One entry per input, in order: the pipeline result dict, or the
+        exception raised while processing that transcript.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run_one(vtt_content: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_pipeline_async(vtt_content, model=model)
+
+    return await asyncio.gather(
+        *(_run_one(vtt_content) for vtt_content in vtt_contents),
+        return_exceptions=True,
+    )
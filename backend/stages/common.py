@@ -2,15 +2,24 @@
 Common utilities shared across all stages.
 """
 from __future__ import annotations
+import asyncio
+import hashlib
+import logging
 import os
+import random
 import time
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Dict, Optional, Tuple
 import httpx
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables FIRST
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ---------- Defaults / Tunables ----------
 # Use gpt-5-mini for ALL stages for consistent, high-quality output
 DEFAULT_MODEL = "gpt-5-mini"  # Hardcoded to ensure consistency
@@ -22,6 +31,16 @@ DEFAULT_MODEL = "gpt-5-mini"  # Hardcoded to ensure consistency
 
 BAD_MODEL_LITERALS = {"string", "model", ""}
 
+# Retry tuning for LLM calls: exponential backoff (5s, 10s, 20s...) capped
+# at RETRY_MAX_DELAY, retrying only throttling and transient server errors.
+# Connection failures are retried the same way. Timeouts get a smaller
+# budget: each one already costs minutes, so a hung deployment gives up sooner.
+RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("LLM_MAX_ATTEMPTS") or 5))
+RETRY_MAX_TIMEOUTS = 3
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 60.0
+RETRIABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
 # Global default Azure configuration
 AZURE_AI_ENDPOINT = os.getenv("AZURE_AI_ENDPOINT")
 AZURE_AI_KEY = os.getenv("AZURE_AI_KEY")
@@ -42,10 +61,44 @@ STAGE3_MODEL = os.getenv("STAGE3_MODEL") or "gpt-5-mini"
 STAGE3_ENDPOINT = os.getenv("STAGE3_ENDPOINT") or AZURE_AI_ENDPOINT
 STAGE3_KEY = os.getenv("STAGE3_KEY") or AZURE_AI_KEY
 
-# Debug: Print loaded values (will be visible on startup)
-print(f"[CONFIG] AZURE_AI_ENDPOINT: {AZURE_AI_ENDPOINT}")
-print(f"[CONFIG] AZURE_AI_KEY: {'***' + AZURE_AI_KEY[-4:] if AZURE_AI_KEY else 'NOT SET'}")
-print(f"[CONFIG] AZURE_AI_DEPLOYMENT: {AZURE_AI_DEPLOYMENT}")
+# In-process cache of successful LLM responses keyed by a hash of the
+# request, so re-running the same meeting does not pay for the same calls.
+# Set LLM_CACHE_TTL_SEC=0 to disable.
+LLM_CACHE_TTL_SEC = float(os.getenv("LLM_CACHE_TTL_SEC") or 600)
+LLM_CACHE_MAX_ENTRIES = 256
+_response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# Optional routing of short meetings to a cheaper/faster deployment.
+# Disabled unless SMALL_MEETING_MODEL is set; the deployment must exist on
+# every stage endpoint because it replaces the per-stage models.
+SMALL_MEETING_MODEL = os.getenv("SMALL_MEETING_MODEL") or None
+SMALL_MEETING_MAX_CHARS = int(os.getenv("SMALL_MEETING_MAX_CHARS") or 6000)
+
+# Log loaded values (will be visible on startup)
+logger.info("[CONFIG] AZURE_AI_ENDPOINT: %s", AZURE_AI_ENDPOINT)
+logger.info("[CONFIG] AZURE_AI_KEY: %s", "***" + AZURE_AI_KEY[-4:] if AZURE_AI_KEY else "NOT SET")
+logger.info("[CONFIG] AZURE_AI_DEPLOYMENT: %s", AZURE_AI_DEPLOYMENT)
+
+
+def _strict_object(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON Schema object in strict structured-output form (all keys required)."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+
+def _to_int(value: Any, default: int = 0) -> int:
+    """Coerce a model-supplied number (int, float or numeric string) to int."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
 
 
 def _fmt_local(ms: int) -> str:
@@ -56,6 +109,19 @@ def _fmt_local(ms: int) -> str:
     return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
 
 
+def _fmt_clock(ms: int) -> str:
+    """Format milliseconds to HH:MM:SS (second precision, for prompts)"""
+    return _fmt_seconds(int(ms) // 1000)
+
+
+@lru_cache(maxsize=4096)
+def _fmt_seconds(total_s: int) -> str:
+    """Format whole seconds to HH:MM:SS; cached since utterances often share a second."""
+    m, s = divmod(total_s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
 def _truncate(text: str, limit: int) -> str:
     """Truncate text to limit, keeping beginning and end."""
     if len(text) <= limit:
@@ -74,6 +140,117 @@ def _resolve_model(model: Optional[str]) -> str:
     return model
 
 
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+# Close tasks for replaced clients, referenced so they aren't garbage collected
+_closing_clients: "set[asyncio.Task]" = set()
+
+
+async def _close_stale_client(client: httpx.AsyncClient) -> None:
+    """Close a client left over from an earlier event loop, ignoring errors."""
+    try:
+        await client.aclose()
+    except Exception as e:  # noqa: BLE001 - its loop may already be closed
+        logger.warning("Failed to close stale HTTP client cleanly: %s", e)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared AsyncClient for LLM calls.
+
+    Reusing one pooled client keeps TCP/TLS connections alive between stage
+    calls and retries. A new client is created if the running event loop
+    changed (e.g. the synchronous stage wrappers each call asyncio.run).
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        if _http_client is not None and not _http_client.is_closed:
+            # Client from a previous loop: release its pooled connections
+            task = loop.create_task(_close_stale_client(_http_client))
+            _closing_clients.add(task)
+            task.add_done_callback(_closing_clients.discard)
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60.0),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared AsyncClient (called on application shutdown)."""
+    global _http_client, _http_client_loop
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+
+def _cache_key(url: str, body: bytes) -> str:
+    """Hash the target URL and serialized payload into a cache key."""
+    digest = hashlib.blake2b(url.encode(), digest_size=16)
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Return a cached response if present and not expired."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, content = entry
+    if time.monotonic() - stored_at > LLM_CACHE_TTL_SEC:
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return content
+
+
+def _cache_put(key: str, content: str) -> None:
+    """Store a response, evicting the least recently used entries."""
+    _response_cache[key] = (time.monotonic(), content)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > LLM_CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+
+
+def _cache_evict(content: str) -> None:
+    """
+    Drop cached entries holding this response text.
+
+    Stages call this when a reply fails to parse or normalize, so a rerun
+    asks the model again instead of replaying the same broken output.
+    """
+    if not content:
+        return
+    for key in [k for k, (_, cached) in _response_cache.items() if cached == content]:
+        del _response_cache[key]
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Read the server's retry hint (retry-after-ms or retry-after seconds)."""
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date form or garbage; fall back to our own backoff
+    return None
+
+
+def _retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before retry `attempt`: server hint, else jittered backoff."""
+    if retry_after is not None and retry_after >= 0:
+        return min(retry_after, RETRY_MAX_DELAY)
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    # Jitter keeps concurrent meetings from retrying in lockstep
+    return delay * random.uniform(0.5, 1.5)
+
+
 async def call_ollama_cloud_async(
     model: str,
     messages: List[Dict[str, str]],
@@ -81,7 +258,10 @@ async def call_ollama_cloud_async(
     endpoint: Optional[str] = None,
     api_key: Optional[str] = None,
     temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None
+    max_tokens: Optional[int] = None,
+    deadline: Optional[float] = None,
+    cache: bool = True,
+    response_schema: Optional[Dict[str, Any]] = None
 ) -> str:
     """
     Call Azure AI Foundry deployment asynchronously and return response content.
@@ -94,6 +274,11 @@ async def call_ollama_cloud_async(
         api_key: Optional custom API key (defaults to AZURE_AI_KEY)
         temperature: Optional temperature setting for model (0.0-1.0)
         max_tokens: Optional max completion tokens limit
+        deadline: Optional absolute time.monotonic() deadline for the whole
+            call, including retries and backoff waits
+        cache: Whether to serve/store this request in the response cache
+        response_schema: Optional strict JSON Schema (with a "title") the
+            response must follow; replaces plain JSON mode when given
 
     Returns:
         Response content string
@@ -108,7 +293,7 @@ async def call_ollama_cloud_async(
     # IMPORTANT: Use the model parameter passed from each stage, NOT the global AZURE_AI_DEPLOYMENT
     # Each stage explicitly sets its model (e.g., STAGE1_MODEL = "gpt-5-mini")
     deployment = _resolve_model(model) if model else AZURE_AI_DEPLOYMENT
-    print(f"[DEBUG] Using deployment: {deployment} (passed model: {model})")
+    logger.debug("Using deployment: %s (passed model: %s)", deployment, model)
 
     # Azure AI Foundry uses OpenAI-compatible endpoint format
     # Format: https://{endpoint}/openai/v1/chat/completions
@@ -145,116 +330,149 @@ async def call_ollama_cloud_async(
         # Azure AI Foundry with GPT-5 requires max_completion_tokens
         payload["max_completion_tokens"] = max_tokens
 
-    if json_mode:
+    if json_mode and response_schema:
+        # Structured outputs: the decoder is constrained to the schema
+        payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": response_schema.get("title", "response"),
+                "schema": response_schema,
+                "strict": True,
+            },
+        }
+    elif json_mode:
         payload["response_format"] = {"type": "json_object"}
 
+    # Serialize once: the same bytes are sent on every attempt and their
+    # length doubles as the logged request size
+    body = orjson.dumps(payload)
+    payload_size = len(body)
+
+    cache_key = _cache_key(url, body) if cache and LLM_CACHE_TTL_SEC > 0 else None
+    if cache_key:
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.info("Reusing cached response for %s (%d chars)", deployment, len(cached))
+            return cached
+
     # Retry configuration
-    max_retries = 3
+    max_retries = RETRY_MAX_ATTEMPTS
     base_timeout = 600.0  # 10 minutes base timeout for large meetings
-    
+    retry_after: Optional[float] = None
+    timeouts = 0
+
     for attempt in range(max_retries):
+        # Grow the timeout on later attempts, but never past 2x the base
+        current_timeout = min(base_timeout * (1.5 ** attempt), base_timeout * 2)
+
+        if attempt > 0:
+            wait_time = _retry_delay(attempt, retry_after)
+            if deadline is not None and time.monotonic() + wait_time >= deadline:
+                raise RuntimeError("Azure AI request deadline exceeded while waiting to retry")
+            logger.warning("Retry attempt %d/%d after %.1fs wait...", attempt + 1, max_retries, wait_time)
+            await asyncio.sleep(wait_time)
+            retry_after = None
+
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError("Azure AI request deadline exceeded")
+            current_timeout = min(current_timeout, remaining)
+
         try:
-            # Calculate and log request size
-            import json as json_lib
-            payload_size = len(json_lib.dumps(payload))
-            current_timeout = base_timeout * (1.5 ** attempt)  # Exponential backoff for timeout
+            logger.debug("Calling Azure AI with URL: %s", url)
+            logger.debug("Deployment: %s", deployment)
+            logger.debug("Temperature: %s", temperature if temperature is not None else "default")
+            logger.debug("Max tokens: %s", max_tokens if max_tokens is not None else "unlimited")
+            logger.debug("Payload size: %d bytes", payload_size)
+            logger.debug("Timeout: %.0f seconds (%.1f minutes)", current_timeout, current_timeout / 60)
+            logger.debug("Attempt: %d/%d", attempt + 1, max_retries)
+
+            client = get_http_client()
+            response = await client.post(url, content=body, headers=headers, timeout=current_timeout)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+
+            logger.debug("Response status: %s", response.status_code)
+            logger.debug("Response data keys: %s", data.keys())
+
+            choices = data.get("choices") or [{}]
+            choice = choices[0]
+            message = choice.get("message", {})
+            content = message.get("content", "")
             
-            if attempt > 0:
-                wait_time = 5 * (2 ** (attempt - 1))  # 5s, 10s, 20s...
-                print(f"[RETRY] Attempt {attempt + 1}/{max_retries} after {wait_time}s wait...")
-                import asyncio
-                await asyncio.sleep(wait_time)
+            # Extract and log token usage
+            usage = data.get("usage", {})
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+            total_tokens = usage.get("total_tokens", 0)
             
-            print(f"[DEBUG] Calling Azure AI with URL: {url}")
-            print(f"[DEBUG] Deployment: {deployment}")
-            print(f"[DEBUG] Temperature: {temperature if temperature is not None else 'default'}")
-            print(f"[DEBUG] Max tokens: {max_tokens if max_tokens is not None else 'unlimited'}")
-            print(f"[DEBUG] Payload size: {payload_size:,} bytes")
-            print(f"[DEBUG] Timeout: {current_timeout:.0f} seconds ({current_timeout/60:.1f} minutes)")
-            print(f"[DEBUG] Attempt: {attempt + 1}/{max_retries}")
-
-            async with httpx.AsyncClient(timeout=current_timeout) as client:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-
-                print(f"[DEBUG] Response status: {response.status_code}")
-                print(f"[DEBUG] Response data keys: {data.keys()}")
-
-                choices = data.get("choices") or [{}]
-                choice = choices[0]
-                message = choice.get("message", {})
-                content = message.get("content", "")
-                
-                # Extract and log token usage
-                usage = data.get("usage", {})
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-                total_tokens = usage.get("total_tokens", 0)
-                
-                # Get detailed completion breakdown (GPT-5 models)
-                completion_details = usage.get("completion_tokens_details", {})
-                reasoning_tokens = completion_details.get("reasoning_tokens", 0)
-                output_tokens = completion_tokens - reasoning_tokens
-                
-                print(f"[TOKENS] ═══════════════════════════════════")
-                print(f"[TOKENS] Prompt tokens:     {prompt_tokens:,}")
-                print(f"[TOKENS] Completion tokens: {completion_tokens:,}")
-                if reasoning_tokens > 0:
-                    print(f"[TOKENS]   ├─ Reasoning:    {reasoning_tokens:,}")
-                    print(f"[TOKENS]   └─ Output:       {output_tokens:,}")
-                print(f"[TOKENS] Total tokens:      {total_tokens:,}")
-                print(f"[TOKENS] ═══════════════════════════════════")
-                
-                # Check finish_reason to detect truncation
-                finish_reason = choice.get("finish_reason", "unknown")
-                print(f"[DEBUG] Finish reason: {finish_reason}")
-                
-                if finish_reason == "length":
-                    print(f"[WARNING] Response was TRUNCATED due to token limit! Consider increasing max_tokens.")
-                elif finish_reason == "content_filter":
-                    print(f"[WARNING] Response was filtered by content filter.")
-
-                if not content:
-                    print("[ERROR] Azure AI returned empty content. Full response:")
-                    try:
-                        import json as json_lib
-                        print(json_lib.dumps(data, indent=2)[:2000])
-                    except Exception:
-                        print(data)
-                    raise RuntimeError("Azure AI returned an empty response. Please verify the deployment and prompt.")
-
-                print(f"[DEBUG] Content length: {len(content)}")
-                print(f"[DEBUG] Content preview: {content[:200]}")
-
-                return content
-                
-        except httpx.TimeoutException as e:
-            print(f"[WARN] Azure AI Timeout on attempt {attempt + 1}/{max_retries}: {type(e).__name__}")
-            if attempt == max_retries - 1:
-                print(f"[ERROR] All {max_retries} attempts failed due to timeout")
-                raise RuntimeError(f"Azure AI request timed out after {max_retries} attempts. The model may be overloaded.")
+            # Get detailed completion breakdown (GPT-5 models)
+            cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+            completion_details = usage.get("completion_tokens_details", {})
+            reasoning_tokens = completion_details.get("reasoning_tokens", 0)
+            output_tokens = completion_tokens - reasoning_tokens
+            
+            logger.debug(
+                "Tokens: prompt=%s (cached=%s), completion=%s (reasoning=%s, output=%s), total=%s",
+                prompt_tokens, cached_tokens, completion_tokens, reasoning_tokens, output_tokens, total_tokens,
+            )
+            
+            # Check finish_reason to detect truncation
+            finish_reason = choice.get("finish_reason", "unknown")
+            logger.debug("Finish reason: %s", finish_reason)
+            
+            if finish_reason == "length":
+                logger.warning("Response was TRUNCATED due to token limit! Consider increasing max_tokens.")
+            elif finish_reason == "content_filter":
+                logger.warning("Response was filtered by content filter.")
+
+            if not content:
+                try:
+                    dump = orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()[:2000]
+                except Exception:
+                    dump = repr(data)
+                logger.error("Azure AI returned empty content. Full response:\n%s", dump)
+                raise RuntimeError("Azure AI returned an empty response. Please verify the deployment and prompt.")
+
+            logger.debug("Content length: %d", len(content))
+            logger.debug("Content preview: %s", content[:200])
+
+            # Only complete replies are reusable; truncated or filtered
+            # output would otherwise be replayed on every rerun
+            if cache_key and finish_reason == "stop":
+                _cache_put(cache_key, content)
+            return content
+            
+        except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+            logger.warning("Azure AI Timeout on attempt %d/%d: %s", attempt + 1, max_retries, type(e).__name__)
+            timeouts += 1
+            if timeouts >= RETRY_MAX_TIMEOUTS or attempt == max_retries - 1:
+                logger.error("Giving up after %d timeout(s)", timeouts)
+                raise RuntimeError(f"Azure AI request timed out after {attempt + 1} attempts. The model may be overloaded.")
             # Continue to next retry
             continue
             
         except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
             detail = e.response.text if hasattr(e.response, 'text') else str(e)
-            print(f"[ERROR] Azure AI HTTP Error {e.response.status_code}: {detail}")
-            print(f"[ERROR] Request URL: {url}")
-            # Don't retry on HTTP errors (4xx, 5xx are usually not transient)
-            raise RuntimeError(f"Azure AI HTTP error: {e.response.status_code} - {detail}")
+            logger.error("Azure AI HTTP Error %s: %s (URL: %s)", status_code, detail, url)
+            # Only throttling and transient server errors are worth retrying;
+            # anything else (bad request, auth, missing deployment) fails fast
+            if status_code not in RETRIABLE_STATUS_CODES or attempt == max_retries - 1:
+                raise RuntimeError(f"Azure AI HTTP error: {status_code} - {detail}")
+            retry_after = _retry_after_seconds(e.response)
+            continue
             
         except httpx.RequestError as e:
-            print(f"[WARN] Azure AI Request Error on attempt {attempt + 1}/{max_retries}: {str(e)}")
+            logger.warning("Azure AI Request Error on attempt %d/%d: %s", attempt + 1, max_retries, e)
             if attempt == max_retries - 1:
                 raise RuntimeError(f"Azure AI request error after {max_retries} attempts: {str(e)}")
             # Continue to next retry for network errors
             continue
             
         except Exception as e:
-            print(f"[ERROR] Azure AI Unexpected Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Azure AI Unexpected Error: %s", e)
             raise RuntimeError(f"Azure AI unexpected error: {e}")
     
     # Should not reach here, but just in case
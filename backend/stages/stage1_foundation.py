@@ -4,48 +4,16 @@ Extract meeting metadata, timeline key moments, and chapter boundaries.
 This provides the structural foundation for subsequent stages.
 """
 from __future__ import annotations
-import json
+import io
+import logging
 from typing import List, Dict, Any, Optional
-from .common import call_ollama_cloud_async, _resolve_model, _fmt_local, STAGE1_MODEL, STAGE1_ENDPOINT, STAGE1_KEY
+import orjson
+from .common import call_ollama_cloud_async, _cache_evict, _fmt_local, _fmt_clock, _strict_object, _STRING_LIST, _to_int, STAGE1_MODEL, STAGE1_ENDPOINT, STAGE1_KEY
 
+logger = logging.getLogger(__name__)
 
-async def run_foundation_stage_async(
-    utterances: List[Dict[str, Any]],
-    model: Optional[str] = None
-) -> Dict[str, Any]:
-    """
-    Stage 1: Extract meeting structure and foundation.
 
-    Args:
-        utterances: List of {speaker, text, start_ms, end_ms}
-        model: Optional model override
-
-    Returns:
-        {
-            "meeting_details": {title, date, duration_ms, participants, unknown_count},
-            "timeline": [{timestamp_ms, event, speakers}],
-            "chapters": [{chapter_id, title, start_ms, end_ms, topic_keywords}]
-        }
-    """
-    if not utterances:
-        return _empty_foundation()
-
-    # Build full transcript with speaker labels (no timestamps in output)
-    transcript_lines = []
-    for utt in utterances:
-        speaker = utt.get("speaker", "Unknown")
-        text = utt.get("text", "").strip()
-        start_ms = utt.get("start_ms", 0)
-        if text:
-            transcript_lines.append(f"[{_fmt_local(start_ms)}] {speaker}: {text}")
-
-    full_transcript = "\n".join(transcript_lines)
-
-    # Calculate meeting duration
-    duration_ms = utterances[-1].get("end_ms", 0) if utterances else 0
-
-    # Build optimized prompt using best practices
-    system_prompt = """You are an expert meeting analyst. Extract the structural foundation of meetings with precision and clarity.
+SYSTEM_PROMPT = """You are an expert meeting analyst. Extract the structural foundation of meetings with precision and clarity.
 
 Your role: Identify meeting metadata, key moments, and thematic chapters.
 
@@ -55,43 +23,40 @@ Output requirements:
 - Create clear, professional labels
 - Ensure complete coverage of the meeting"""
 
-    user_prompt = f"""Analyze this meeting transcript and extract its structure.
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
-TRANSCRIPT:
-{full_transcript}
-
-MEETING INFO:
-- Utterances: {len(utterances)}
-- Duration: {_fmt_local(duration_ms)}
+# Static instructions go ahead of the transcript so the prompt prefix is
+# byte-identical across meetings and provider-side prompt caching can reuse it.
+FOUNDATION_INSTRUCTIONS = """Analyze this meeting transcript and extract its structure.
 
 Return a JSON object with this EXACT structure:
 
-{{
-  "meeting_details": {{
+{
+  "meeting_details": {
     "title": "Professional 3-8 word title capturing the meeting's purpose",
     "date": "YYYY-MM-DD format (leave empty if date not mentioned in transcript)",
-    "duration_ms": {duration_ms},
+    "duration_ms": 0,
     "participants": ["List", "of", "unique", "speaker", "names"],
     "unknown_count": 0
-  }},
+  },
   "timeline": [
-    {{
+    {
       "timestamp_ms": 0,
       "event": "Brief description of what happened at this moment",
       "speakers": ["Who was involved"]
-    }}
+    }
   ],
   "chapters": [
-    {{
+    {
       "chapter_id": "ch1",
       "title": "Clear 3-6 word chapter title",
       "start_ms": 0,
       "end_ms": 180000,
       "topic_keywords": ["keyword1", "keyword2", "keyword3"],
       "summary": "Comprehensive summary of everything discussed in this chapter..."
-    }}
+    }
   ]
-}}
+}
 
 EXTRACTION GUIDELINES:
 
@@ -118,53 +83,138 @@ Chapters (3-7 thematic sections):
   * What decisions, agreements, or conclusions were reached?
   * What questions or issues remain open?
   * Any important numbers, dates, or specifics mentioned
-  * DO NOT limit length - cover ALL important content from this section
+  * DO NOT limit length - cover ALL important content from this section"""
+
+
+# Shape enforced on the model's reply; mirrors the example in FOUNDATION_INSTRUCTIONS
+FOUNDATION_SCHEMA: Dict[str, Any] = {
+    "title": "meeting_foundation",
+    **_strict_object({
+        "meeting_details": _strict_object({
+            "title": {"type": "string"},
+            "date": {"type": "string"},
+            "duration_ms": {"type": "integer"},
+            "participants": _STRING_LIST,
+            "unknown_count": {"type": "integer"},
+        }),
+        "timeline": {
+            "type": "array",
+            "items": _strict_object({
+                "timestamp_ms": {"type": "integer"},
+                "event": {"type": "string"},
+                "speakers": _STRING_LIST,
+            }),
+        },
+        "chapters": {
+            "type": "array",
+            "items": _strict_object({
+                "chapter_id": {"type": "string"},
+                "title": {"type": "string"},
+                "start_ms": {"type": "integer"},
+                "end_ms": {"type": "integer"},
+                "topic_keywords": _STRING_LIST,
+                "summary": {"type": "string"},
+            }),
+        },
+    }),
+}
 
-Return ONLY valid JSON."""
+
+async def run_foundation_stage_async(
+    utterances: List[Dict[str, Any]],
+    model: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Stage 1: Extract meeting structure and foundation.
+
+    Args:
+        utterances: List of {speaker, text, start_ms, end_ms}
+        model: Optional model override
+
+    Returns:
+        {
+            "meeting_details": {title, date, duration_ms, participants, unknown_count},
+            "timeline": [{timestamp_ms, event, speakers}],
+            "chapters": [{chapter_id, title, start_ms, end_ms, topic_keywords}]
+        }
+    """
+    if not utterances:
+        return _empty_foundation()
+
+    # Build full transcript with speaker labels (no timestamps in output)
+    # Written straight into one buffer rather than a list of N line strings
+    buf = io.StringIO()
+    w = buf.write
+    for utt in utterances:
+        text = utt.get("text", "").strip()
+        if text:
+            if buf.tell():
+                w("\n")
+            w(f"[{_fmt_clock(utt.get('start_ms', 0))}] {utt.get('speaker', 'Unknown')}: ")
+            w(text)
+
+    full_transcript = buf.getvalue()
+
+    # Calculate meeting duration
+    duration_ms = utterances[-1].get("end_ms", 0) if utterances else 0
+
+    # Instructions first (static, cacheable prefix), meeting data last
+    user_prompt = "".join((
+        FOUNDATION_INSTRUCTIONS,
+        "\n\nTRANSCRIPT:\n",
+        full_transcript,
+        f"\n\nMEETING INFO:\n- Utterances: {len(utterances)}\n"
+        f"- Duration: {_fmt_local(duration_ms)} ({duration_ms} ms)\n\n"
+        "Return ONLY valid JSON.",
+    ))
 
     messages = [
-        {"role": "system", "content": system_prompt},
+        _SYSTEM_MESSAGE,
         {"role": "user", "content": user_prompt}
     ]
+    response_text = ""
 
     try:
         import time
         start_time = time.time()
 
         stage_model = model if model else STAGE1_MODEL
-        print(f"[STAGE 1] Starting foundation extraction...")
-        print(f"[STAGE 1] Model: {stage_model}")
+        logger.info("Starting foundation extraction (model: %s)", stage_model)
 
         response_text = await call_ollama_cloud_async(
             model=stage_model,
             messages=messages,
             json_mode=True,
             endpoint=STAGE1_ENDPOINT,
-            api_key=STAGE1_KEY
+            api_key=STAGE1_KEY,
+            response_schema=FOUNDATION_SCHEMA
             # No max_tokens - let GPT-5 use what it needs for reasoning + output
         )
-        result = json.loads(response_text)
+        result = orjson.loads(response_text)
 
         # Validate and normalize
         result = _normalize_foundation(result, utterances, duration_ms)
 
         elapsed_time = time.time() - start_time
-        print(f"[STAGE 1] ✓ Foundation extraction complete in {elapsed_time:.2f}s")
-        print(f"  - Meeting: {result['meeting_details'].get('title', 'N/A')}")
-        print(f"  - Participants: {len(result['meeting_details'].get('participants', []))}")
-        print(f"  - Timeline points: {len(result.get('timeline', []))}")
-        print(f"  - Chapters: {len(result.get('chapters', []))}")
+        logger.info(
+            "Foundation extraction complete in %.2fs: meeting=%r, participants=%d, timeline points=%d, chapters=%d",
+            elapsed_time,
+            result["meeting_details"].get("title", "N/A"),
+            len(result["meeting_details"].get("participants", [])),
+            len(result.get("timeline", [])),
+            len(result.get("chapters", [])),
+        )
 
         return result
 
-    except json.JSONDecodeError as e:
-        print(f"[STAGE 1] JSON decode error: {e}")
-        print(f"[STAGE 1] Response text: {response_text[:500]}")
+    except orjson.JSONDecodeError as e:
+        logger.error("JSON decode error: %s; response text: %s", e, response_text[:500])
+        _cache_evict(response_text)
         return _empty_foundation()
     except Exception as e:
-        print(f"[STAGE 1] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Foundation extraction failed: %s", e)
+        # Don't let a reply that broke normalization be served again
+        _cache_evict(response_text)
         return _empty_foundation()
 
 
@@ -175,27 +225,26 @@ def _repair_timeline(timeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     if not timeline:
         return timeline
-    
-    # Sort by timestamp
-    sorted_timeline = sorted(timeline, key=lambda x: x.get("timestamp_ms", 0))
-    
+
+    # Pull timestamps and comparison keys out once so the dedupe pass below
+    # works on parallel lists instead of re-reading (and re-lowering) dicts.
+    timestamps = [point.get("timestamp_ms", 0) for point in timeline]
+    event_keys = [point.get("event", "").strip().lower() for point in timeline]
+    order = sorted(range(len(timeline)), key=timestamps.__getitem__)
+
     # Remove duplicates (events within 5 seconds of each other)
     deduped = []
-    for point in sorted_timeline:
-        if not deduped:
-            deduped.append(point)
-            continue
-        
-        last_point = deduped[-1]
-        time_diff = abs(point.get("timestamp_ms", 0) - last_point.get("timestamp_ms", 0))
-        
-        # If more than 5 seconds apart, keep it
-        if time_diff > 5000:
-            deduped.append(point)
-        # If same event text, skip (duplicate)
-        elif point.get("event", "").strip().lower() != last_point.get("event", "").strip().lower():
-            deduped.append(point)
-    
+    last_ts = 0
+    last_key = None
+    for idx in order:
+        ts = timestamps[idx]
+        key = event_keys[idx]
+        # Keep if first, more than 5 seconds apart, or different event text
+        if last_key is None or abs(ts - last_ts) > 5000 or key != last_key:
+            deduped.append(timeline[idx])
+            last_ts = ts
+            last_key = key
+
     return deduped
 
 
@@ -258,15 +307,16 @@ def _normalize_foundation(result: Dict[str, Any], utterances: List[Dict[str, Any
 
     # Extract unique participants from utterances if not provided
     if not meeting_details.get("participants"):
-        participants = set()
+        # dict keeps first-seen order, so no sort pass is needed
+        participants: Dict[str, None] = {}
         unknown_count = 0
         for utt in utterances:
             speaker = utt.get("speaker", "Unknown")
             if speaker.lower() == "unknown":
                 unknown_count += 1
             else:
-                participants.add(speaker)
-        meeting_details["participants"] = sorted(list(participants))
+                participants[speaker] = None
+        meeting_details["participants"] = list(participants)
         meeting_details["unknown_count"] = unknown_count
 
     meeting_details.setdefault("title", "Untitled Meeting")
@@ -280,13 +330,21 @@ def _normalize_foundation(result: Dict[str, Any], utterances: List[Dict[str, Any
 
     normalized_timeline = []
     for point in timeline:
-        if isinstance(point, dict) and "timestamp_ms" in point:
-            normalized_timeline.append({
-                "timestamp_ms": int(point.get("timestamp_ms", 0)),
-                "event": str(point.get("event", point.get("text", ""))).strip(),
-                "speakers": point.get("speakers", [])
-            })
-    
+        if not isinstance(point, dict) or "timestamp_ms" not in point:
+            continue
+        get = point.get
+        event = get("event")
+        if event is None:
+            event = get("text", "")
+        event = str(event).strip()
+        if not event:
+            continue
+        normalized_timeline.append({
+            "timestamp_ms": _to_int(get("timestamp_ms"), 0),
+            "event": event,
+            "speakers": get("speakers", [])
+        })
+
     # Repair timeline: sort and dedupe
     normalized_timeline = _repair_timeline(normalized_timeline)
 
@@ -298,13 +356,14 @@ def _normalize_foundation(result: Dict[str, Any], utterances: List[Dict[str, Any
     normalized_chapters = []
     for i, chapter in enumerate(chapters):
         if isinstance(chapter, dict):
+            get = chapter.get
             normalized_chapters.append({
-                "chapter_id": chapter.get("chapter_id", f"ch{i+1}"),
-                "title": str(chapter.get("title", f"Chapter {i+1}")).strip(),
-                "start_ms": int(chapter.get("start_ms", 0)),
-                "end_ms": int(chapter.get("end_ms", duration_ms)),
-                "topic_keywords": chapter.get("topic_keywords", []),
-                "summary": str(chapter.get("summary", "")).strip()
+                "chapter_id": get("chapter_id") or f"ch{i+1}",
+                "title": str(get("title") or f"Chapter {i+1}").strip(),
+                "start_ms": _to_int(get("start_ms"), 0),
+                "end_ms": _to_int(get("end_ms"), duration_ms),
+                "topic_keywords": get("topic_keywords") or [],
+                "summary": str(get("summary") or "").strip()
             })
 
     # If no chapters, create a default one
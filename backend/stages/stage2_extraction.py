@@ -4,9 +4,139 @@ Extract action items, achievements, blockers, and Six Thinking Hats analysis.
 This stage focuses on exhaustive extraction with evidence from the transcript.
 """
 from __future__ import annotations
-import json
+import io
+import logging
+import re
 from typing import List, Dict, Any, Optional
-from .common import call_ollama_cloud_async, _resolve_model, _fmt_local, STAGE2_MODEL, STAGE2_ENDPOINT, STAGE2_KEY
+import orjson
+from .common import call_ollama_cloud_async, _cache_evict, _strict_object, _STRING_LIST, STAGE2_MODEL, STAGE2_ENDPOINT, STAGE2_KEY
+
+logger = logging.getLogger(__name__)
+
+
+# Outermost {...} span, used to recover JSON wrapped in fences or prose
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+SYSTEM_PROMPT = """You are an expert meeting analyst specializing in actionable insights extraction.
+
+Your primary objectives (in order of importance):
+1. ACTION ITEMS - Find EVERY task, commitment, and follow-up. Miss nothing.
+2. ACHIEVEMENTS - Identify completed work and accomplishments
+3. BLOCKERS - Surface challenges, risks, and obstacles
+4. THINKING STYLES - Analyze each participant's dominant thinking approach
+
+Critical rules:
+- Extract evidence as exact quotes with speaker names (no timestamps)
+- Better to over-extract than miss important items
+- Be specific and actionable in descriptions
+- Assign priority levels based on urgency cues
+- OUTPUT ONLY VALID JSON. No markdown, no preambles."""
+
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Static instructions go ahead of the transcript so the prompt prefix is
+# byte-identical across meetings and provider-side prompt caching can reuse it.
+EXTRACTION_INSTRUCTIONS = """Analyze this meeting transcript and extract all actionable content and group dynamics.
+
+Return JSON with EXACTLY these keys (EVIDENCE = {"speaker": "who said it", "quote": "exact words"}):
+{
+  "tone": {"overall": "collaborative|tense|productive|formal|casual|energetic|subdued", "energy": "high|medium|low", "description": "1-2 sentences; note shifts"},
+  "convergent_points": [{"topic": "", "agreed_by": ["Speaker"], "evidence": EVIDENCE}],
+  "divergent_points": [{"topic": "", "perspectives": [{"speaker": "", "view": ""}], "resolution": "or 'Unresolved'"}],
+  "action_items": [{"task": "verb + object + context", "owner": "Name|Team|Unassigned", "deadline": "date|This week|ASAP|''", "priority": "high|medium|low", "evidence": EVIDENCE}],
+  "achievements": [{"achievement": "", "members": ["Name"], "evidence": EVIDENCE}],
+  "blockers": [{"blocker": "", "severity": "critical|major|minor", "affected_members": ["Name"], "evidence": EVIDENCE}],
+  "six_thinking_hats": [{"participant": "Name", "dominant_hat": "white|red|black|yellow|green|blue", "explanation": "3 sentences"}]
+}
+
+Rules:
+- convergent_points: 2-5 points of explicit agreement or shared conclusions ("I agree", "makes sense").
+- divergent_points: disagreements, debates, competing proposals; include resolution if reached.
+- action_items (most critical - scan EVERY line): "I will/I'll/Let me", "We should/need to/have to", "Can/Could/Would you...?", "Someone should/This needs to". Owner is the speaker for "I will", the person asked for "Can you". Priority: high = urgent/blocking, medium = important, low = nice-to-have.
+- achievements: past-tense completions ("finished", "shipped", "fixed", "deployed") and who did them.
+- blockers: risks, concerns, dependencies, constraints. Severity: critical = blocks progress, major = significant impact, minor = inconvenience.
+- six_thinking_hats: ONE dominant hat per participant; "participant" is the speaker name EXACTLY as written in the transcript (full name, same spelling). White = facts/data, Red = feelings/intuition, Black = risks/caution, Yellow = benefits/optimism, Green = creative ideas, Blue = process/facilitation. explanation is EXACTLY 3 sentences: the behaviors shown, how they shaped outcomes, and a concrete example or quote."""
+
+
+_EVIDENCE_SCHEMA = _strict_object({
+    "speaker": {"type": "string"},
+    "quote": {"type": "string"},
+})
+
+# Shape enforced on the model's reply; mirrors the example in EXTRACTION_INSTRUCTIONS.
+# Hats are a list here because strict schemas can't describe name-keyed objects;
+# _normalize_extraction folds them back into {participant: {...}}.
+EXTRACTION_SCHEMA: Dict[str, Any] = {
+    "title": "meeting_extraction",
+    **_strict_object({
+        "tone": _strict_object({
+            "overall": {"type": "string"},
+            "energy": {"type": "string"},
+            "description": {"type": "string"},
+        }),
+        "convergent_points": {
+            "type": "array",
+            "items": _strict_object({
+                "topic": {"type": "string"},
+                "agreed_by": _STRING_LIST,
+                "evidence": _EVIDENCE_SCHEMA,
+            }),
+        },
+        "divergent_points": {
+            "type": "array",
+            "items": _strict_object({
+                "topic": {"type": "string"},
+                "perspectives": {
+                    "type": "array",
+                    "items": _strict_object({
+                        "speaker": {"type": "string"},
+                        "view": {"type": "string"},
+                    }),
+                },
+                "resolution": {"type": "string"},
+            }),
+        },
+        "action_items": {
+            "type": "array",
+            "items": _strict_object({
+                "task": {"type": "string"},
+                "owner": {"type": "string"},
+                "deadline": {"type": "string"},
+                "priority": {"type": "string", "enum": ["high", "medium", "low"]},
+                "evidence": _EVIDENCE_SCHEMA,
+            }),
+        },
+        "achievements": {
+            "type": "array",
+            "items": _strict_object({
+                "achievement": {"type": "string"},
+                "members": _STRING_LIST,
+                "evidence": _EVIDENCE_SCHEMA,
+            }),
+        },
+        "blockers": {
+            "type": "array",
+            "items": _strict_object({
+                "blocker": {"type": "string"},
+                "severity": {"type": "string", "enum": ["critical", "major", "minor"]},
+                "affected_members": _STRING_LIST,
+                "evidence": _EVIDENCE_SCHEMA,
+            }),
+        },
+        "six_thinking_hats": {
+            "type": "array",
+            "items": _strict_object({
+                "participant": {"type": "string"},
+                "dominant_hat": {
+                    "type": "string",
+                    "enum": ["white", "red", "black", "yellow", "green", "blue"],
+                },
+                "explanation": {"type": "string"},
+            }),
+        },
+    }),
+}
 
 
 async def run_extraction_stage_async(
@@ -34,14 +164,19 @@ async def run_extraction_stage_async(
         return _empty_extraction()
 
     # Build transcript with speaker labels for evidence extraction
-    transcript_lines = []
+    # Written straight into one buffer rather than a list of N line strings
+    buf = io.StringIO()
+    w = buf.write
     for utt in utterances:
-        speaker = utt.get("speaker", "Unknown")
         text = utt.get("text", "").strip()
         if text:
-            transcript_lines.append(f"{speaker}: {text}")
+            if buf.tell():
+                w("\n")
+            w(utt.get("speaker", "Unknown"))
+            w(": ")
+            w(text)
 
-    full_transcript = "\n".join(transcript_lines)
+    full_transcript = buf.getvalue()
 
     # Build chapter reference for context
     chapter_info = "\n".join([
@@ -49,213 +184,107 @@ async def run_extraction_stage_async(
         for ch in chapters
     ])
 
-    # Optimized system prompt
-    system_prompt = """You are an expert meeting analyst specializing in actionable insights extraction.
-
-Your primary objectives (in order of importance):
-1. ACTION ITEMS - Find EVERY task, commitment, and follow-up. Miss nothing.
-2. ACHIEVEMENTS - Identify completed work and accomplishments
-3. BLOCKERS - Surface challenges, risks, and obstacles
-4. THINKING STYLES - Analyze each participant's dominant thinking approach
-
-Critical rules:
-- Extract evidence as exact quotes with speaker names (no timestamps)
-- Better to over-extract than miss important items
-- Be specific and actionable in descriptions
-- Assign priority levels based on urgency cues
-- OUTPUT ONLY VALID JSON. No markdown, no preambles."""
-
-    user_prompt = f"""Analyze this meeting transcript and extract all actionable content and group dynamics.
-
-TRANSCRIPT:
-{full_transcript}
-
-CHAPTERS:
-{chapter_info}
-
-Return a JSON object with this EXACT structure:
-
-{{
-  "tone": {{
-    "overall": "collaborative | tense | productive | formal | casual | energetic | subdued",
-    "energy": "high | medium | low",
-    "description": "1-2 sentence description of meeting atmosphere and how it evolved"
-  }},
-  "convergent_points": [
-    {{
-      "topic": "What everyone agreed on",
-      "agreed_by": ["Speaker1", "Speaker2"],
-      "evidence": {{
-        "speaker": "Who voiced the agreement",
-        "quote": "Exact quote showing consensus"
-      }}
-    }}
-  ],
-  "divergent_points": [
-    {{
-      "topic": "What topic had different opinions",
-      "perspectives": [
-        {{"speaker": "Person1", "view": "Their position or preference"}},
-        {{"speaker": "Person2", "view": "Their contrasting position"}}
-      ],
-      "resolution": "How it was resolved, or 'Unresolved' if still open"
-    }}
-  ],
-  "action_items": [
-    {{
-      "task": "Clear, specific description of what needs to be done",
-      "owner": "Person Name (or 'Team' if group, 'Unassigned' if unclear)",
-      "deadline": "Specific date, 'This week', 'ASAP', or '' if not specified",
-      "priority": "high, medium, or low",
-      "evidence": {{
-        "speaker": "Who said it",
-        "quote": "Exact words from transcript showing the commitment"
-      }}
-    }}
-  ],
-  "achievements": [
-    {{
-      "achievement": "Clear description of what was completed",
-      "members": ["Who accomplished it"],
-      "evidence": {{
-        "speaker": "Who mentioned it",
-        "quote": "Exact words confirming the achievement"
-      }}
-    }}
-  ],
-  "blockers": [
-    {{
-      "blocker": "Clear description of the challenge or obstacle",
-      "severity": "critical, major, or minor",
-      "affected_members": ["Who is impacted"],
-      "evidence": {{
-        "speaker": "Who raised it",
-        "quote": "Exact words describing the blocker"
-      }}
-    }}
-  ],
-  "six_thinking_hats": {{
-    "PersonName": {{
-      "dominant_hat": "white|red|black|yellow|green|blue",
-      "explanation": "Why this hat based on their contributions"
-    }}
-  }}
-}}
-
-EXTRACTION RULES:
-
-TONE ANALYSIS:
-- overall: Assess the dominant emotional quality of interactions
-- energy: How animated/engaged were participants?
-- description: Note if tone shifted during the meeting (e.g., "Started formal, became collaborative after ice-breaker")
-
-CONVERGENT POINTS (Where everyone aligned):
-- Look for explicit agreement: "I agree", "That makes sense", "We're all on the same page"
-- Look for unanimous decisions or shared conclusions
-- Include 2-5 key points where the team reached consensus
-
-DIVERGENT POINTS (Where opinions differed):
-- Look for disagreement: "I think differently", "On the other hand", "I'm not sure about that"
-- Look for debates, alternative proposals, or competing priorities
-- Include resolution if one was reached during the meeting
-
-ACTION ITEMS (Most Critical - be thorough):
-- Scan EVERY line for commitments using these patterns:
-  * "I will...", "I'll...", "Let me..."
-  * "We should...", "We need to...", "We have to..."
-  * "Can you...?", "Could you...?", "Would you...?"
-  * "Someone should...", "This needs to..."
-- task: Make it actionable (verb + object + context)
-- owner: Extract from "I will" (speaker) or "Can you" (person asked)
-- priority: high (urgent/blocking), medium (important), low (nice-to-have)
-- evidence: Include speaker name and their exact quote
-
-ACHIEVEMENTS:
-- Look for past-tense completions: "finished", "completed", "shipped", "fixed", "deployed"
-- Include who was involved in the accomplishment
-
-BLOCKERS:
-- Identify: risks, concerns, obstacles, dependencies, constraints
-- severity: critical (blocking progress), major (significant impact), minor (inconvenience)
-- Flag anything that could delay or prevent success
-
-SIX THINKING HATS (assign ONE dominant hat per participant based on their behavior):
-- White: Gathered relevant data and facts before decisions (analytical, information-focused)
-- Red: Expressed feelings and gut reactions to ideas (emotional, intuitive)
-- Black: Identified potential risks and challenges early (cautious, critical thinker)
-- Yellow: Highlighted positive aspects and benefits (optimistic, opportunity-focused)
-- Green: Encouraged brainstorming and creative thinking (innovative, idea generator)
-- Blue: Kept the team organized and followed processes (facilitative, process-oriented)
-
-IMPORTANT: For each participant's "explanation" field, provide EXACTLY 3 sentences:
-1. What specific behaviors or statements demonstrated this hat
-2. How this thinking style contributed to the meeting outcomes
-3. A concrete example or quote that exemplifies their dominant hat
-
-Return ONLY valid JSON."""
+    # Instructions first (static, cacheable prefix), meeting data last
+    user_prompt = "".join((
+        EXTRACTION_INSTRUCTIONS,
+        "\n\nTRANSCRIPT:\n",
+        full_transcript,
+        "\n\nCHAPTERS:\n",
+        chapter_info,
+        "\n\nReturn ONLY valid JSON.",
+    ))
 
     messages = [
-        {"role": "system", "content": system_prompt},
+        _SYSTEM_MESSAGE,
         {"role": "user", "content": user_prompt}
     ]
+    response_text = ""
 
     try:
         import time
         start_time = time.time()
 
         stage_model = model if model else STAGE2_MODEL
-        print(f"[STAGE 2] Starting deep extraction...")
-        print(f"[STAGE 2] Model: {stage_model}")
+        logger.info("Starting deep extraction (model: %s)", stage_model)
 
         response_text = await call_ollama_cloud_async(
             model=stage_model,
             messages=messages,
             json_mode=True,
             endpoint=STAGE2_ENDPOINT,
-            api_key=STAGE2_KEY
+            api_key=STAGE2_KEY,
+            response_schema=EXTRACTION_SCHEMA
             # No max_tokens - let GPT-5 use what it needs
         )
-        result = json.loads(response_text)
+        result = orjson.loads(response_text)
 
         # Normalize and validate
         result = _normalize_extraction(result)
 
         elapsed_time = time.time() - start_time
-        print(f"[STAGE 2] ✓ Deep extraction complete in {elapsed_time:.2f}s")
-        print(f"  - Action items: {len(result.get('action_items', []))}")
-        print(f"  - Achievements: {len(result.get('achievements', []))}")
-        print(f"  - Blockers: {len(result.get('blockers', []))}")
-        print(f"  - Participants analyzed: {len(result.get('six_thinking_hats', {}))}")
+        logger.info(
+            "Deep extraction complete in %.2fs: action items=%d, achievements=%d, blockers=%d, participants analyzed=%d",
+            elapsed_time,
+            len(result.get("action_items", [])),
+            len(result.get("achievements", [])),
+            len(result.get("blockers", [])),
+            len(result.get("six_thinking_hats", {})),
+        )
 
         return result
 
-    except json.JSONDecodeError as e:
-        print(f"[STAGE 2] JSON decode error: {e}")
+    except orjson.JSONDecodeError as e:
+        logger.warning("JSON decode error: %s", e)
         # Try to repair/extract JSON
         try:
-            import re
             # Extract content between first { and last }
-            match = re.search(r'(\{.*\})', response_text, re.DOTALL)
+            match = _JSON_OBJECT_RE.search(response_text)
             if match:
-                json_str = match.group(1)
-                result = json.loads(json_str)
+                json_str = match.group(0)
+                result = orjson.loads(json_str)
                 result = _normalize_extraction(result)
                 
                 elapsed_time = time.time() - start_time
-                print(f"[STAGE 2] ✓ Recovered JSON from text in {elapsed_time:.2f}s")
+                logger.info("Recovered JSON from text in %.2fs", elapsed_time)
                 return result
         except Exception as repair_err:
-            print(f"[STAGE 2] JSON repair failed: {repair_err}")
+            logger.warning("JSON repair failed: %s", repair_err)
 
-        print(f"[STAGE 2] Response text start: {response_text[:500]}")
+        logger.error("Unparseable response, text start: %s", response_text[:500])
+        _cache_evict(response_text)
         return _empty_extraction()
     except Exception as e:
-        print(f"[STAGE 2] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Deep extraction failed: %s", e)
+        # Don't let a reply that broke normalization be served again
+        _cache_evict(response_text)
         return _empty_extraction()
 
 
+# Model wording -> canonical priority/severity, built once instead of per item
+_PRIORITY_MAP = {
+    "high": "high", "medium": "medium", "low": "low",
+    "urgent": "high", "critical": "high", "important": "high",
+    "normal": "medium", "moderate": "medium",
+    "minor": "low", "trivial": "low", "nice-to-have": "low"
+}
+
+_SEVERITY_MAP = {
+    "critical": "critical", "major": "major", "minor": "minor",
+    "high": "critical", "severe": "critical", "blocking": "critical",
+    "medium": "major", "moderate": "major", "significant": "major",
+    "low": "minor", "trivial": "minor", "inconvenience": "minor"
+}
+
+
+def _coerce_evidence(evidence: Any) -> Dict[str, str]:
+    """Coerce an evidence value (dict, list of dicts, or junk) to {speaker, quote}."""
+    if isinstance(evidence, list) and evidence:
+        evidence = evidence[0]  # Take first if array
+    if not isinstance(evidence, dict):
+        return {"speaker": "", "quote": ""}
+    return {"speaker": evidence.get("speaker", ""), "quote": evidence.get("quote", "")}
+
+
 def _normalize_extraction(result: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize and validate extraction stage output."""
 
@@ -267,29 +296,15 @@ def _normalize_extraction(result: Dict[str, Any]) -> Dict[str, Any]:
     normalized_actions = []
     for item in action_items:
         if isinstance(item, dict) and item.get("task"):
-            evidence = item.get("evidence", {})
-            if isinstance(evidence, list) and len(evidence) > 0:
-                evidence = evidence[0]  # Take first if array
-            
             # Normalize priority to valid values: high, medium, low
-            priority_raw = str(item.get("priority", "medium")).lower().strip()
-            priority_map = {
-                "high": "high", "medium": "medium", "low": "low",
-                "urgent": "high", "critical": "high", "important": "high",
-                "normal": "medium", "moderate": "medium",
-                "minor": "low", "trivial": "low", "nice-to-have": "low"
-            }
-            priority = priority_map.get(priority_raw, "medium")
-            
+            priority = _PRIORITY_MAP.get(str(item.get("priority", "medium")).lower().strip(), "medium")
+
             normalized_actions.append({
                 "task": str(item.get("task", "")).strip(),
                 "owner": str(item.get("owner", "Unassigned")).strip(),
                 "deadline": str(item.get("deadline", "")).strip(),
                 "priority": priority,
-                "evidence": {
-                    "speaker": evidence.get("speaker", "") if isinstance(evidence, dict) else "",
-                    "quote": evidence.get("quote", "") if isinstance(evidence, dict) else ""
-                }
+                "evidence": _coerce_evidence(item.get("evidence"))
             })
 
     # Normalize achievements
@@ -300,17 +315,10 @@ def _normalize_extraction(result: Dict[str, Any]) -> Dict[str, Any]:
     normalized_achievements = []
     for item in achievements:
         if isinstance(item, dict) and item.get("achievement"):
-            evidence = item.get("evidence", {})
-            if isinstance(evidence, list) and len(evidence) > 0:
-                evidence = evidence[0]
-            
             normalized_achievements.append({
                 "achievement": str(item.get("achievement", "")).strip(),
                 "members": item.get("members", []),
-                "evidence": {
-                    "speaker": evidence.get("speaker", "") if isinstance(evidence, dict) else "",
-                    "quote": evidence.get("quote", "") if isinstance(evidence, dict) else ""
-                }
+                "evidence": _coerce_evidence(item.get("evidence"))
             })
 
     # Normalize blockers
@@ -321,33 +329,26 @@ def _normalize_extraction(result: Dict[str, Any]) -> Dict[str, Any]:
     normalized_blockers = []
     for item in blockers:
         if isinstance(item, dict) and item.get("blocker"):
-            evidence = item.get("evidence", {})
-            if isinstance(evidence, list) and len(evidence) > 0:
-                evidence = evidence[0]
-            
             # Normalize severity to valid values: critical, major, minor
-            severity_raw = str(item.get("severity", "major")).lower().strip()
-            severity_map = {
-                "critical": "critical", "major": "major", "minor": "minor",
-                "high": "critical", "severe": "critical", "blocking": "critical",
-                "medium": "major", "moderate": "major", "significant": "major",
-                "low": "minor", "trivial": "minor", "inconvenience": "minor"
-            }
-            severity = severity_map.get(severity_raw, "major")
-            
+            severity = _SEVERITY_MAP.get(str(item.get("severity", "major")).lower().strip(), "major")
+
             normalized_blockers.append({
                 "blocker": str(item.get("blocker", "")).strip(),
                 "severity": severity,
                 "affected_members": item.get("affected_members", []),
-                "evidence": {
-                    "speaker": evidence.get("speaker", "") if isinstance(evidence, dict) else "",
-                    "quote": evidence.get("quote", "") if isinstance(evidence, dict) else ""
-                }
+                "evidence": _coerce_evidence(item.get("evidence"))
             })
 
     # Normalize six thinking hats
     hats = result.get("six_thinking_hats", {})
-    if not isinstance(hats, dict):
+    if isinstance(hats, list):
+        # Schema form: [{participant, dominant_hat, explanation}]
+        hats = {
+            str(h.get("participant", "")).strip(): h
+            for h in hats
+            if isinstance(h, dict) and str(h.get("participant", "")).strip()
+        }
+    elif not isinstance(hats, dict):
         hats = {}
 
     normalized_hats = {}
@@ -377,17 +378,10 @@ def _normalize_extraction(result: Dict[str, Any]) -> Dict[str, Any]:
     normalized_convergent = []
     for item in convergent:
         if isinstance(item, dict) and item.get("topic"):
-            evidence = item.get("evidence", {})
-            if isinstance(evidence, list) and len(evidence) > 0:
-                evidence = evidence[0]
-            
             normalized_convergent.append({
                 "topic": str(item.get("topic", "")).strip(),
                 "agreed_by": item.get("agreed_by", []),
-                "evidence": {
-                    "speaker": evidence.get("speaker", "") if isinstance(evidence, dict) else "",
-                    "quote": evidence.get("quote", "") if isinstance(evidence, dict) else ""
-                }
+                "evidence": _coerce_evidence(item.get("evidence"))
             })
 
     # Normalize divergent points
@@ -4,10 +4,73 @@ Generate comprehensive executive summary from STRUCTURED DATA ONLY.
 Does NOT require the transcript - uses Stage 1 & 2 outputs exclusively.
 """
 from __future__ import annotations
-import json
+import io
+import logging
 import re
 from typing import List, Dict, Any, Optional
-from .common import call_ollama_cloud_async, STAGE3_MODEL, STAGE3_ENDPOINT, STAGE3_KEY
+import orjson
+from .common import call_ollama_cloud_async, _cache_evict, _strict_object, STAGE3_MODEL, STAGE3_ENDPOINT, STAGE3_KEY
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = """You are an expert meeting summarizer. Write a professional 6-section narrative summary.
+
+IMPORTANT: You are working from STRUCTURED DATA extracted from the meeting, NOT from the transcript.
+Write a coherent narrative that synthesizes this data into readable prose.
+
+OUTPUT FORMAT:
+- Use **bold** for section headers
+- Use ## for topic subheaders under Discussion Topics
+- Use bullet points (-) for lists
+- Be concise but comprehensive
+- Write in past tense
+- Do NOT include Action Items or Decisions sections"""
+
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Static instructions go ahead of the meeting data so the prompt prefix is
+# byte-identical across meetings and provider-side prompt caching can reuse it.
+SYNTHESIS_INSTRUCTIONS = """Return JSON:
+{
+  "narrative_summary": "markdown with 6 sections",
+  "chapters": [{"chapter_id": "ch1", "summary": "Detailed paragraph (5-7 sentences)"}]
+}
+
+narrative_summary MUST contain ALL 6 sections, in this order (output is INCOMPLETE otherwise):
+
+1. ## Meeting Tone
+   1-2 paragraphs on the atmosphere, from TONE below.
+2. ## Executive Overview
+   3-4 sentences: purpose, attendees, main outcomes.
+3. ## Key Takeaways
+   4-6 bullet points of the most important insights.
+4. ## Discussion Topics
+   One "### [Topic Title]" with a brief description per chapter listed below.
+5. ## Aligned Thinking
+   AGREEMENTS below rewritten as prose bullets, or "No major consensus points were explicitly noted."
+6. ## Divergent Perspectives
+   Bullets giving each person's view and the resolution, bold topic first, e.g.
+   - **Feature priority**: Alice wanted mobile, Bob wanted API. Resolution: Parallel tracks.
+   Or "No significant disagreements were observed."
+
+Each chapter summary is a DETAILED PARAGRAPH (5-7 sentences)."""
+
+
+# Shape enforced on the model's reply; mirrors the example in SYNTHESIS_INSTRUCTIONS
+SYNTHESIS_SCHEMA: Dict[str, Any] = {
+    "title": "meeting_synthesis",
+    **_strict_object({
+        "narrative_summary": {"type": "string"},
+        "chapters": {
+            "type": "array",
+            "items": _strict_object({
+                "chapter_id": {"type": "string"},
+                "summary": {"type": "string"},
+            }),
+        },
+    }),
+}
 
 
 async def run_synthesis_stage_async(
@@ -52,13 +115,19 @@ async def run_synthesis_stage_async(
         return _empty_synthesis(chapters)
 
     # Build chapter context
-    chapter_info = []
+    buf = io.StringIO()
+    w = buf.write
     for ch in chapters:
-        ch_title = ch.get('title', 'Chapter')
-        ch_keywords = ', '.join(ch.get('topic_keywords', [])[:5])
-        ch_id = ch.get('chapter_id', '')
-        chapter_info.append(f"- {ch_id}: {ch_title} (Topics: {ch_keywords})")
-    chapters_text = "\n".join(chapter_info) if chapter_info else "No chapters identified"
+        get = ch.get
+        if buf.tell():
+            w("\n")
+        w(f"- {get('chapter_id', '')}: {get('title', 'Chapter')}")
+        keywords = get('topic_keywords') or ()
+        if keywords:
+            w(" (Topics: ")
+            w(", ".join(keywords[:5]))
+            w(")")
+    chapters_text = buf.getvalue() or "No chapters identified"
 
     # Build tone context
     tone_text = "Not analyzed"
@@ -74,7 +143,7 @@ async def run_synthesis_stage_async(
         for cp in convergent_points:
             topic = cp.get('topic', '')
             agreed_by = ', '.join(cp.get('agreed_by', []))
-            aligned_items.append(f"- {topic} (Agreed by: {agreed_by})")
+            aligned_items.append(f"- {topic} (Agreed by: {agreed_by})" if agreed_by else f"- {topic}")
         aligned_text = "\n".join(aligned_items)
 
     # Build divergent points
@@ -99,37 +168,36 @@ async def run_synthesis_stage_async(
         participants_text = "\n".join(hats_items)
 
     # Build key outcomes context
-    key_outcomes = []
+    buf = io.StringIO()
+    w = buf.write
     if action_items:
-        key_outcomes.append(f"ACTION ITEMS ({len(action_items)} total):")
+        w(f"ACTION ITEMS ({len(action_items)} total):")
         for item in action_items[:5]:
-            key_outcomes.append(f"  - {item.get('task', '')} (Owner: {item.get('owner', 'Unassigned')})")
+            w("\n  - ")
+            w(item.get('task', ''))
+            owner = item.get('owner')
+            if owner and owner != 'Unassigned':
+                w(f" (Owner: {owner})")
     if achievements:
-        key_outcomes.append(f"ACHIEVEMENTS ({len(achievements)} total):")
+        if buf.tell():
+            w("\n")
+        w(f"ACHIEVEMENTS ({len(achievements)} total):")
         for ach in achievements[:3]:
-            key_outcomes.append(f"  - {ach.get('achievement', '')}")
+            w("\n  - ")
+            w(ach.get('achievement', ''))
     if blockers:
-        key_outcomes.append(f"BLOCKERS ({len(blockers)} total):")
+        if buf.tell():
+            w("\n")
+        w(f"BLOCKERS ({len(blockers)} total):")
         for blk in blockers[:3]:
-            key_outcomes.append(f"  - {blk.get('blocker', '')} ({blk.get('severity', 'major')})")
-    outcomes_text = "\n".join(key_outcomes) if key_outcomes else "No specific outcomes extracted"
+            get = blk.get
+            w(f"\n  - {get('blocker', '')} ({get('severity', 'major')})")
+    outcomes_text = buf.getvalue() or "No specific outcomes extracted"
 
-    # System prompt
-    system_prompt = """You are an expert meeting summarizer. Write a professional 6-section narrative summary.
-
-IMPORTANT: You are working from STRUCTURED DATA extracted from the meeting, NOT from the transcript.
-Write a coherent narrative that synthesizes this data into readable prose.
-
-OUTPUT FORMAT:
-- Use **bold** for section headers
-- Use ## for topic subheaders under Discussion Topics
-- Use bullet points (-) for lists
-- Be concise but comprehensive
-- Write in past tense
-- Do NOT include Action Items or Decisions sections"""
+    # Instructions first (static, cacheable prefix), structured data last
+    user_prompt = SYNTHESIS_INSTRUCTIONS + f"""
 
-    # User prompt with ONLY structured data
-    user_prompt = f"""Write a 6-section meeting summary from this STRUCTURED DATA:
+Write a 6-section meeting summary from this STRUCTURED DATA:
 
 === MEETING STRUCTURE ===
 CHAPTERS/TOPICS:
@@ -150,73 +218,33 @@ PARTICIPANTS:
 === OUTCOMES (context only, don't include in narrative) ===
 {outcomes_text}
 
-=== GENERATE EXACTLY THIS STRUCTURE ===
-
-Return JSON:
-{{
-  "narrative_summary": "markdown with 6 sections",
-  "chapters": [{{"chapter_id": "ch1", "summary": "Detailed paragraph (5-7 sentences)"}}]
-}}
-
-
-=== CRITICAL: ALL 6 SECTIONS ARE MANDATORY ===
-
-Your narrative_summary MUST have EXACTLY these 6 sections IN THIS ORDER:
-
-1. ## Meeting Tone  ← DO NOT SKIP THIS
-   1-2 paragraphs describing atmosphere based on the tone data provided above.
-
-2. ## Executive Overview
-   3-4 sentences: meeting purpose, attendees, main outcomes.
-
-3. ## Key Takeaways
-   - 4-6 bullet points of most important insights
-
-4. ## Discussion Topics
-   ### [Topic Title from chapters]
-   Brief description of what was discussed.
-   (Create section for each chapter listed above)
-
-5. ## Aligned Thinking  ← DO NOT SKIP THIS
-   Rewrite the agreements from the AGREEMENTS section above as prose bullet points.
-   If no agreements were identified, write "No major consensus points were explicitly noted."
-
-6. ## Divergent Perspectives  ← DO NOT SKIP THIS
-   Rewrite disagreements showing each person's view and resolution.
-   FORMAT: Use bold for the specific topic.
-   Example:
-   - **Feature priority**: Alice wanted mobile, Bob wanted API. Resolution: Parallel tracks.
-   
-   If no disagreements were identified, write "No significant disagreements were observed."
-
-WARNING: Your output is INCOMPLETE if it does not contain all 6 sections!
-
-For chapter summaries, write a DETAILED PARAGRAPH (5-7 sentences) for each chapter.
-
 Return ONLY valid JSON."""
 
     messages = [
-        {"role": "system", "content": system_prompt},
+        _SYSTEM_MESSAGE,
         {"role": "user", "content": user_prompt}
     ]
+    response_text = ""
 
     try:
         import time
         start_time = time.time()
 
         stage_model = model if model else STAGE3_MODEL
-        print(f"[STAGE 3] Starting OPTIMIZED synthesis (no transcript!)...")
-        print(f"[STAGE 3] Model: {stage_model}")
-        print(f"[STAGE 3] Input: {len(chapters)} chapters, {len(convergent_points)} agreements, {len(divergent_points)} disagreements")
+        logger.info(
+            "Starting synthesis without transcript (model: %s): %d chapters, %d agreements, %d disagreements",
+            stage_model, len(chapters), len(convergent_points), len(divergent_points),
+        )
 
         response_text = await call_ollama_cloud_async(
             model=stage_model,
             messages=messages,
             json_mode=True,
             endpoint=STAGE3_ENDPOINT,
-            api_key=STAGE3_KEY
+            api_key=STAGE3_KEY,
+            response_schema=SYNTHESIS_SCHEMA
         )
-        result = json.loads(response_text)
+        result = orjson.loads(response_text)
 
         # Normalize and fix markdown headers
         narrative = result.get("narrative_summary", "")
@@ -226,45 +254,63 @@ Return ONLY valid JSON."""
         result = _normalize_synthesis(result, chapters)
 
         elapsed_time = time.time() - start_time
-        print(f"[STAGE 3] ✓ Narrative synthesis complete in {elapsed_time:.2f}s")
-        print(f"[STAGE 3] - Narrative summary: {len(result.get('narrative_summary', ''))} chars")
-        print(f"[STAGE 3] - Chapter summaries: {len(result.get('chapters', []))}")
+        logger.info(
+            "Narrative synthesis complete in %.2fs: narrative summary=%d chars, chapter summaries=%d",
+            elapsed_time,
+            len(result.get("narrative_summary", "")),
+            len(result.get("chapters", [])),
+        )
 
         return result
 
-    except json.JSONDecodeError as e:
-        print(f"[STAGE 3] JSON decode error: {e}")
-        print(f"[STAGE 3] Response text: {response_text[:500] if response_text else 'empty'}")
+    except orjson.JSONDecodeError as e:
+        logger.error("JSON decode error: %s; response text: %s", e, response_text[:500] if response_text else "empty")
+        _cache_evict(response_text)
         return _empty_synthesis(chapters)
     except Exception as e:
-        print(f"[STAGE 3] Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Narrative synthesis failed: %s", e)
+        # Don't let a reply that broke normalization be served again
+        _cache_evict(response_text)
         return _empty_synthesis(chapters)
 
 
+# Timestamp patterns like (00:00:00) or (00:00:00–00:00:00)
+_TIMESTAMP_RE = re.compile(r'\(\d{2}:\d{2}:\d{2}(?:–\d{2}:\d{2}:\d{2})?\)')
+
+# Replace **Section** or just Section (on its own line) with ## Section.
+# Case insensitive match, but preserve Proper Case in replacement.
+_SECTION_HEADER_FIXES = [
+    (
+        re.compile(r'^\s*(?:\*\*|##)?\s*' + re.escape(section) + r'(?:\*\*)?\s*$', re.MULTILINE | re.IGNORECASE),
+        f'## {section}',
+    )
+    for section in (
+        "Meeting Tone", "Executive Overview", "Key Takeaways",
+        "Discussion Topics", "Aligned Thinking", "Divergent Perspectives"
+    )
+]
+
+_LEGACY_SECTION_RE = re.compile(
+    r'\n(?:\*\*|##)?\s*(?:\d+\.\s*)?(?:Decisions Made|Action Items)(?:\*\*|)?[\s\S]*?(?=\n(?:##|\*\*)|$)',
+    re.IGNORECASE,
+)
+
+
 def _fix_markdown_headers(text: str) -> str:
     """Fix markdown headers and remove timestamps."""
     if not text:
         return ""
     
     # Remove timestamp patterns
-    text = re.sub(r'\(\d{2}:\d{2}:\d{2}(?:–\d{2}:\d{2}:\d{2})?\)', '', text)
+    text = _TIMESTAMP_RE.sub('', text)
 
     # 1. Promote "**Section Name**" to "## Section Name" for main sections
     # This prevents validation from failing if LLM uses bold instead of H2
-    sections_to_fix = [
-        "Meeting Tone", "Executive Overview", "Key Takeaways", 
-        "Discussion Topics", "Aligned Thinking", "Divergent Perspectives"
-    ]
-    for section in sections_to_fix:
-        # Replace **Section** or just Section (on its own line) with ## Section
-        # Case insensitive match, but preserve Proper Case in replacement
-        pattern = re.compile(r'^\s*(?:\*\*|##)?\s*' + re.escape(section) + r'(?:\*\*)?\s*$', re.MULTILINE | re.IGNORECASE)
-        text = pattern.sub(f'## {section}', text)
+    for pattern, heading in _SECTION_HEADER_FIXES:
+        text = pattern.sub(heading, text)
 
     # Remove stray Decisions Made or Action Items sections (Legacy cleanup)
-    text = re.sub(r'\n(?:\*\*|##)?\s*(?:\d+\.\s*)?(?:Decisions Made|Action Items)(?:\*\*|)?[\s\S]*?(?=\n(?:##|\*\*)|$)', '', text, flags=re.IGNORECASE)
+    text = _LEGACY_SECTION_RE.sub('', text)
     
     return text.strip()
 
@@ -296,7 +342,7 @@ def _normalize_synthesis(result: Dict[str, Any], original_chapters: List[Dict[st
     
     # Add placeholders for missing sections
     if missing_sections:
-        print(f"[STAGE 3] WARNING: Missing sections: {missing_sections}")
+        logger.warning("Missing sections: %s", missing_sections)
         for section in missing_sections:
             if section == "Executive Overview":
                 narrative_summary = f"## Executive Overview\n\nThis meeting covered key topics.\n\n" + narrative_summary
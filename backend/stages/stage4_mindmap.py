@@ -8,34 +8,34 @@ Simple and easy to understand!
 """
 from __future__ import annotations
 
+import asyncio
 import re
+from functools import lru_cache
 from typing import Any, Dict, Iterable, List, Optional
 
+_WHITESPACE_RE = re.compile(r"\s+")
+# Bullet (-, *, •) or numbered (1., 2.) list item; group 1 is the item text
+_LIST_ITEM_RE = re.compile(r"^(?:[-*•]|\d+\.)\s+(.*)")
+_HEADER_RE = re.compile(r"^#+\s+", flags=re.MULTILINE)
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+_SENTENCE_SPLIT_RE = re.compile(r"[.!?]\s+")
+
 
 def _clean(text: Optional[str]) -> str:
     """Clean and normalize text."""
     if not text:
         return ""
-    return re.sub(r"\s+", " ", str(text)).strip()
-
-
-def _truncate(text: str, max_len: int = 90) -> str:
-    """Truncate text to max length with ellipsis."""
-    text = _clean(text)
-    if len(text) <= max_len:
-        return text
-    return text[:max_len - 1].rstrip() + "…"
+    return _WHITESPACE_RE.sub(" ", str(text)).strip()
 
 
+@lru_cache(maxsize=4096)
 def _format_ms(ms: Optional[int]) -> str:
     """Format milliseconds as HH:MM:SS."""
     if ms is None:
         return "00:00:00"
 
-    seconds_total = int(ms) // 1000
-    seconds = seconds_total % 60
-    minutes = (seconds_total // 60) % 60
-    hours = seconds_total // 3600
+    hours, remainder = divmod(int(ms) // 1000, 3600)
+    minutes, seconds = divmod(remainder, 60)
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
@@ -58,20 +58,12 @@ def _extract_key_points(chapter_summary: str, max_points: int = 2) -> List[str]:
 
     # First, try to find bullet points or numbered lists
     for line in lines:
-        line = line.strip()
-
-        # Match bullet points (-, *, •)
-        if re.match(r'^[-*•]\s+', line):
-            point = re.sub(r'^[-*•]\s+', '', line).strip()
+        # Match bullet points (-, *, •) and numbered lists (1., 2., etc.)
+        match = _LIST_ITEM_RE.match(line.strip())
+        if match:
+            point = match.group(1).strip()
             # Only include substantial points (at least 25 chars)
-            if point and len(point) > 25:
-                points.append(point)
-
-        # Match numbered lists (1., 2., etc.)
-        elif re.match(r'^\d+\.\s+', line):
-            point = re.sub(r'^\d+\.\s+', '', line).strip()
-            # Only include substantial points (at least 25 chars)
-            if point and len(point) > 25:
+            if len(point) > 25:
                 points.append(point)
 
         if len(points) >= max_points:
@@ -80,11 +72,11 @@ def _extract_key_points(chapter_summary: str, max_points: int = 2) -> List[str]:
     # If no list items found, extract first substantial sentences
     if not points:
         # Remove markdown headers and formatting
-        clean_text = re.sub(r'^#+\s+', '', chapter_summary, flags=re.MULTILINE)
-        clean_text = re.sub(r'\*\*(.*?)\*\*', r'\1', clean_text)  # Remove bold
+        clean_text = _HEADER_RE.sub('', chapter_summary)
+        clean_text = _BOLD_RE.sub(r'\1', clean_text)  # Remove bold
 
         # Split into sentences
-        sentences = re.split(r'[.!?]\s+', clean_text)
+        sentences = _SENTENCE_SPLIT_RE.split(clean_text)
         for sentence in sentences:
             sentence = sentence.strip()
             # Only include substantial, meaningful sentences (30+ chars)
@@ -123,7 +115,16 @@ async def build_mindmap_async(
     Returns:
         Mindmap structure with center_node, nodes, and edges
     """
+    # Regex-heavy text processing is CPU-bound; run it off the event loop so
+    # concurrent requests are not stalled while the mindmap is assembled.
+    return await asyncio.to_thread(_build_mindmap, meeting_details, chapters)
+
 
+def _build_mindmap(
+    meeting_details: Dict[str, Any],
+    chapters: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Assemble the mindmap synchronously (root, chapters, key points)."""
     meeting_title = _clean(meeting_details.get("title", "Meeting Mindmap"))
 
     # Create root node
@@ -209,9 +210,5 @@ def build_mindmap(
     timeline: List[Dict[str, Any]],
     hats: Iterable[Dict[str, Any]],
 ) -> Dict[str, Any]:
-    """Synchronous wrapper for build_mindmap_async."""
-    import asyncio
-    return asyncio.run(build_mindmap_async(
-        meeting_details, narrative_summary, chapters,
-        collective_summary, timeline, hats
-    ))
+    """Synchronous entry point; builds the mindmap on the calling thread."""
+    return _build_mindmap(meeting_details, chapters)
@@ -0,0 +1,22 @@
+"""
+Tests for the VTT parser entry points.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.vtt_parser import iter_parse_vtt, parse_vtt, parse_vtt_file  # noqa: E402
+
+BOM_VTT = "\ufeffWEBVTT\n\n00:00:01.000 --> 00:00:02.500\n<v Alice Smith>Hello everyone.\n"
+
+EXPECTED = [{"start_ms": 1000, "end_ms": 2500, "speaker": "Alice Smith", "text": "Hello everyone."}]
+
+
+def test_bom_file_parses_the_same_on_every_entry_point(tmp_path):
+    path = tmp_path / "bom.vtt"
+    path.write_bytes(BOM_VTT.encode("utf-8"))
+
+    assert parse_vtt(BOM_VTT) == EXPECTED
+    assert list(iter_parse_vtt(BOM_VTT.splitlines(keepends=True))) == EXPECTED
+    assert parse_vtt_file(str(path)) == EXPECTED
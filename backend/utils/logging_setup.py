@@ -0,0 +1,52 @@
+"""
+Non-blocking logging setup.
+Log records are queued by the caller and written to stderr by a background
+thread, so logging never blocks the event loop on console I/O.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Route the root logger through a QueueHandler drained by a QueueListener.
+
+    Safe to call more than once; only the first call installs handlers.
+    The level defaults to the LOG_LEVEL env var (INFO if unset).
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel((level or os.getenv("LOG_LEVEL") or "INFO").upper())
+
+    # httpx/httpcore log every request at INFO; keep them to warnings and up
+    for noisy in ("httpx", "httpcore"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
@@ -2,13 +2,19 @@
 Supabase client utilities for database operations.
 Handles projects, meetings, and meeting summaries.
 """
+import asyncio
+import logging
 import os
-from typing import Optional, List, Dict, Any
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple
 from supabase import create_client, Client
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger("aligniq.supabase")
+
 url: str = os.environ.get("SUPABASE_URL")
 key: str = os.environ.get("SUPABASE_KEY")
 
@@ -17,7 +23,7 @@ supabase: Client = None
 if url and key:
     supabase = create_client(url, key)
 else:
-    print("[SUPABASE] Warning: SUPABASE_URL or SUPABASE_KEY not set")
+    logger.warning("SUPABASE_URL or SUPABASE_KEY not set")
 
 
 def get_supabase_client() -> Optional[Client]:
@@ -25,6 +31,50 @@ def get_supabase_client() -> Optional[Client]:
     return supabase
 
 
+# Short-lived cache for by-id lookups that status polling hits repeatedly.
+# Entries are dropped on any write to the same row through this module.
+LOOKUP_CACHE_TTL_SEC = 5.0
+LOOKUP_CACHE_MAX_ENTRIES = 1024
+_lookup_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _lookup_get(table: str, row_id: str) -> Optional[Dict[str, Any]]:
+    """Return a fresh cached row (as a copy), or None."""
+    entry = _lookup_cache.get((table, row_id))
+    if entry is None:
+        return None
+    stored_at, row = entry
+    if time.monotonic() - stored_at > LOOKUP_CACHE_TTL_SEC:
+        _lookup_cache.pop((table, row_id), None)
+        return None
+    return dict(row)
+
+
+def _lookup_put(table: str, row_id: str, row: Optional[Dict[str, Any]]) -> None:
+    """Cache a fetched row; misses are not cached."""
+    if not row:
+        return
+    _lookup_cache[(table, row_id)] = (time.monotonic(), dict(row))
+    _lookup_cache.move_to_end((table, row_id))
+    while len(_lookup_cache) > LOOKUP_CACHE_MAX_ENTRIES:
+        _lookup_cache.popitem(last=False)
+
+
+def _lookup_invalidate(table: str, row_id: str) -> None:
+    """Drop a cached row after it has been written."""
+    _lookup_cache.pop((table, row_id), None)
+
+
+async def _execute(query):
+    """
+    Runs a query builder's blocking execute() in a worker thread.
+
+    The supabase-py client is synchronous; calling execute() directly would
+    stall the event loop for a full network round-trip.
+    """
+    return await asyncio.to_thread(query.execute)
+
+
 # =====================================================
 # PROJECT OPERATIONS
 # =====================================================
@@ -42,10 +92,10 @@ async def create_project(user_id: str, name: str, description: str = None) -> Op
     }
     
     try:
-        response = supabase.table("projects").insert(data).execute()
+        response = await _execute(supabase.table("projects").insert(data))
         return response.data[0]['id'] if response.data else None
     except Exception as e:
-        print(f"[SUPABASE] Error creating project: {e}")
+        logger.error("Error creating project: %s", e)
         return None
 
 
@@ -55,10 +105,10 @@ async def get_user_projects(user_id: str) -> List[Dict[str, Any]]:
         return []
     
     try:
-        response = supabase.table("projects").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
+        response = await _execute(supabase.table("projects").select("*").eq("user_id", user_id).order("created_at", desc=True))
         return response.data or []
     except Exception as e:
-        print(f"[SUPABASE] Error fetching projects: {e}")
+        logger.error("Error fetching projects: %s", e)
         return []
 
 
@@ -67,11 +117,16 @@ async def get_project_by_id(project_id: str) -> Optional[Dict[str, Any]]:
     if not supabase:
         return None
     
+    cached = _lookup_get("projects", project_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table("projects").select("*").eq("id", project_id).single().execute()
+        response = await _execute(supabase.table("projects").select("*").eq("id", project_id).single())
+        _lookup_put("projects", project_id, response.data)
         return response.data
     except Exception as e:
-        print(f"[SUPABASE] Error fetching project: {e}")
+        logger.error("Error fetching project: %s", e)
         return None
 
 
@@ -81,11 +136,13 @@ async def update_project(project_id: str, **kwargs) -> bool:
         return False
     
     try:
-        supabase.table("projects").update(kwargs).eq("id", project_id).execute()
+        await _execute(supabase.table("projects").update(kwargs).eq("id", project_id))
         return True
     except Exception as e:
-        print(f"[SUPABASE] Error updating project: {e}")
+        logger.error("Error updating project: %s", e)
         return False
+    finally:
+        _lookup_invalidate("projects", project_id)
 
 
 async def delete_project(project_id: str) -> bool:
@@ -94,17 +151,28 @@ async def delete_project(project_id: str) -> bool:
         return False
     
     try:
-        supabase.table("projects").delete().eq("id", project_id).execute()
+        await _execute(supabase.table("projects").delete().eq("id", project_id))
         return True
     except Exception as e:
-        print(f"[SUPABASE] Error deleting project: {e}")
+        logger.error("Error deleting project: %s", e)
         return False
+    finally:
+        # meetings.project_id is ON DELETE SET NULL, so the project's cached
+        # meetings now carry a stale project_id as well
+        _lookup_invalidate("projects", project_id)
+        for cache_key, (_, row) in list(_lookup_cache.items()):
+            if cache_key[0] == "meetings" and row.get("project_id") == project_id:
+                _lookup_cache.pop(cache_key, None)
 
 
 # =====================================================
 # MEETING OPERATIONS
 # =====================================================
 
+# Columns returned by meeting listings. Leaves out the heavy timeline_json,
+# which only the detail lookup (get_meeting_by_id) needs.
+MEETING_LIST_COLUMNS = "id,user_id,project_id,title,date,duration_ms,participants,status,created_at,updated_at"
+
 async def create_meeting_record(
     user_id: str, 
     title: str, 
@@ -131,10 +199,10 @@ async def create_meeting_record(
         data["project_id"] = project_id
     
     try:
-        response = supabase.table("meetings").insert(data).execute()
+        response = await _execute(supabase.table("meetings").insert(data))
         return response.data[0]['id'] if response.data else None
     except Exception as e:
-        print(f"[SUPABASE] Error creating meeting record: {e}")
+        logger.error("Error creating meeting record: %s", e)
         return None
 
 
@@ -144,16 +212,16 @@ async def get_user_meetings(user_id: str, project_id: Optional[str] = None) -> L
         return []
     
     try:
-        query = supabase.table("meetings").select("*").eq("user_id", user_id)
+        query = supabase.table("meetings").select(MEETING_LIST_COLUMNS).eq("user_id", user_id)
         
         if project_id:
             # Get meetings for a specific project
             query = query.eq("project_id", project_id)
         
-        response = query.order("created_at", desc=True).execute()
+        response = await _execute(query.order("created_at", desc=True))
         return response.data or []
     except Exception as e:
-        print(f"[SUPABASE] Error fetching meetings: {e}")
+        logger.error("Error fetching meetings: %s", e)
         return []
 
 
@@ -163,10 +231,10 @@ async def get_direct_meetings(user_id: str) -> List[Dict[str, Any]]:
         return []
     
     try:
-        response = supabase.table("meetings").select("*").eq("user_id", user_id).is_("project_id", "null").order("created_at", desc=True).execute()
+        response = await _execute(supabase.table("meetings").select(MEETING_LIST_COLUMNS).eq("user_id", user_id).is_("project_id", "null").order("created_at", desc=True))
         return response.data or []
     except Exception as e:
-        print(f"[SUPABASE] Error fetching direct meetings: {e}")
+        logger.error("Error fetching direct meetings: %s", e)
         return []
 
 
@@ -176,10 +244,10 @@ async def get_project_meetings(project_id: str) -> List[Dict[str, Any]]:
         return []
     
     try:
-        response = supabase.table("meetings").select("*").eq("project_id", project_id).order("created_at", desc=True).execute()
+        response = await _execute(supabase.table("meetings").select(MEETING_LIST_COLUMNS).eq("project_id", project_id).order("created_at", desc=True))
         return response.data or []
     except Exception as e:
-        print(f"[SUPABASE] Error fetching project meetings: {e}")
+        logger.error("Error fetching project meetings: %s", e)
         return []
 
 
@@ -188,11 +256,16 @@ async def get_meeting_by_id(meeting_id: str) -> Optional[Dict[str, Any]]:
     if not supabase:
         return None
     
+    cached = _lookup_get("meetings", meeting_id)
+    if cached is not None:
+        return cached
+
     try:
-        response = supabase.table("meetings").select("*").eq("id", meeting_id).single().execute()
+        response = await _execute(supabase.table("meetings").select("*").eq("id", meeting_id).single())
+        _lookup_put("meetings", meeting_id, response.data)
         return response.data
     except Exception as e:
-        print(f"[SUPABASE] Error fetching meeting: {e}")
+        logger.error("Error fetching meeting: %s", e)
         return None
 
 
@@ -202,9 +275,11 @@ async def update_meeting_status(meeting_id: str, status: str):
         return
         
     try:
-        supabase.table("meetings").update({"status": status}).eq("id", meeting_id).execute()
+        await _execute(supabase.table("meetings").update({"status": status}).eq("id", meeting_id))
     except Exception as e:
-        print(f"[SUPABASE] Error updating meeting status: {e}")
+        logger.error("Error updating meeting status: %s", e)
+    finally:
+        _lookup_invalidate("meetings", meeting_id)
 
 
 async def update_meeting_details(
@@ -228,9 +303,11 @@ async def update_meeting_details(
         data["timeline_json"] = timeline_json
     
     try:
-        supabase.table("meetings").update(data).eq("id", meeting_id).execute()
+        await _execute(supabase.table("meetings").update(data).eq("id", meeting_id))
     except Exception as e:
-        print(f"[SUPABASE] Error updating meeting details: {e}")
+        logger.error("Error updating meeting details: %s", e)
+    finally:
+        _lookup_invalidate("meetings", meeting_id)
 
 
 async def delete_meeting(meeting_id: str) -> bool:
@@ -239,11 +316,13 @@ async def delete_meeting(meeting_id: str) -> bool:
         return False
     
     try:
-        supabase.table("meetings").delete().eq("id", meeting_id).execute()
+        await _execute(supabase.table("meetings").delete().eq("id", meeting_id))
         return True
     except Exception as e:
-        print(f"[SUPABASE] Error deleting meeting: {e}")
+        logger.error("Error deleting meeting: %s", e)
         return False
+    finally:
+        _lookup_invalidate("meetings", meeting_id)
 
 
 # =====================================================
@@ -272,16 +351,18 @@ async def save_meeting_results(
     
     try:
         # Upsert to handle both insert and update cases
-        supabase.table("meeting_summaries").upsert(data).execute()
-        
-        # Also update status to completed and save timeline to meetings table
-        await update_meeting_status(meeting_id, "completed")
+        await _execute(supabase.table("meeting_summaries").upsert(data))
         
+        # Mark completed and save timeline to meetings table in one round-trip
+        meeting_update = {"status": "completed"}
         if timeline:
-            supabase.table("meetings").update({"timeline_json": timeline}).eq("id", meeting_id).execute()
+            meeting_update["timeline_json"] = timeline
+        await _execute(supabase.table("meetings").update(meeting_update).eq("id", meeting_id))
             
     except Exception as e:
-        print(f"[SUPABASE] Error saving meeting results: {e}")
+        logger.error("Error saving meeting results: %s", e)
+    finally:
+        _lookup_invalidate("meetings", meeting_id)
 
 
 async def get_meeting_summary(meeting_id: str) -> Optional[Dict[str, Any]]:
@@ -290,10 +371,10 @@ async def get_meeting_summary(meeting_id: str) -> Optional[Dict[str, Any]]:
         return None
     
     try:
-        response = supabase.table("meeting_summaries").select("*").eq("meeting_id", meeting_id).single().execute()
+        response = await _execute(supabase.table("meeting_summaries").select("*").eq("meeting_id", meeting_id).single())
         return response.data
     except Exception as e:
-        print(f"[SUPABASE] Error fetching meeting summary: {e}")
+        logger.error("Error fetching meeting summary: %s", e)
         return None
 
 
@@ -307,28 +388,17 @@ async def get_project_stats(project_id: str) -> Dict[str, Any]:
         return {"meetings_count": 0, "tasks_count": 0}
     
     try:
-        # Get meetings count
-        meetings_response = supabase.table("meetings").select("id", count="exact").eq("project_id", project_id).execute()
-        meetings_count = meetings_response.count or 0
-        
-        # Get completed meetings to count tasks
-        summaries_response = supabase.table("meetings").select("id, meeting_summaries(summary_json)").eq("project_id", project_id).eq("status", "completed").execute()
-        
-        tasks_count = 0
-        tasks_done = 0
-        for meeting in summaries_response.data or []:
-            if meeting.get("meeting_summaries") and meeting["meeting_summaries"].get("summary_json"):
-                action_items = meeting["meeting_summaries"]["summary_json"].get("action_items", [])
-                tasks_count += len(action_items)
-                tasks_done += sum(1 for t in action_items if t.get("status") == "done")
-        
+        # Counted server-side by the project_stats() function (migration 010)
+        response = await _execute(supabase.rpc("project_stats", {"p_id": project_id}))
+        row = response.data[0] if response.data else {}
+
         return {
-            "meetings_count": meetings_count,
-            "tasks_count": tasks_count,
-            "tasks_done": tasks_done
+            "meetings_count": row.get("meetings_count") or 0,
+            "tasks_count": row.get("tasks_count") or 0,
+            "tasks_done": row.get("tasks_done") or 0
         }
     except Exception as e:
-        print(f"[SUPABASE] Error fetching project stats: {e}")
+        logger.error("Error fetching project stats: %s", e)
         return {"meetings_count": 0, "tasks_count": 0, "tasks_done": 0}
 
 
@@ -338,16 +408,15 @@ async def get_user_stats(user_id: str) -> Dict[str, Any]:
         return {}
     
     try:
-        # Get projects count
-        projects_response = supabase.table("projects").select("id", count="exact").eq("user_id", user_id).execute()
-        
-        # Get meetings count
-        meetings_response = supabase.table("meetings").select("id", count="exact").eq("user_id", user_id).execute()
-        
-        # Get this week's meetings
         from datetime import datetime, timedelta
         week_ago = (datetime.now() - timedelta(days=7)).isoformat()
-        recent_response = supabase.table("meetings").select("id", count="exact").eq("user_id", user_id).gte("created_at", week_ago).execute()
+
+        # Independent counts - issue them concurrently
+        projects_response, meetings_response, recent_response = await asyncio.gather(
+            _execute(supabase.table("projects").select("id", count="exact").eq("user_id", user_id)),
+            _execute(supabase.table("meetings").select("id", count="exact").eq("user_id", user_id)),
+            _execute(supabase.table("meetings").select("id", count="exact").eq("user_id", user_id).gte("created_at", week_ago))
+        )
         
         return {
             "projects_count": projects_response.count or 0,
@@ -355,5 +424,5 @@ async def get_user_stats(user_id: str) -> Dict[str, Any]:
             "recent_meetings_count": recent_response.count or 0
         }
     except Exception as e:
-        print(f"[SUPABASE] Error fetching user stats: {e}")
+        logger.error("Error fetching user stats: %s", e)
         return {}
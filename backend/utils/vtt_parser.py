@@ -3,37 +3,47 @@ VTT Parser for Microsoft Teams transcripts.
 Parses .vtt files and extracts utterances with timestamps and speakers.
 """
 import re
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List
 
 
-def parse_timestamp(ts: str) -> int:
-    """
-    Parse VTT timestamp (HH:MM:SS.mmm) to milliseconds.
-    Example: "00:01:23.456" -> 83456
-    """
-    ts = ts.strip()
-    # Handle format: HH:MM:SS.mmm or MM:SS.mmm
-    parts = ts.split(":")
-    if len(parts) == 3:
-        h, m, s = parts
-        h = int(h)
-    elif len(parts) == 2:
-        h = 0
-        m, s = parts
-    else:
-        return 0
+# Cue timestamp split into [hours:]minutes:seconds[.millis] digit groups
+_TS = r"(?:(\d+):)?(\d+):(\d+)(?:\.(\d+))?"
+
+# One cue: the timing line plus the payload line that follows it. The payload
+# is either "<v Speaker>text", "Speaker: text", or bare text.
+_CUE_RE = re.compile(
+    r"^[ \t]*" + _TS + r"[ \t]*-->[ \t]*" + _TS + r"[^\n]*\n"
+    r"[ \t]*(?:<v[ \t]+([^>\n]+)>(.*)|([^:\n]+):[ \t]*(.*)|(.*))$",
+    re.MULTILINE,
+)
 
-    m = int(m)
-    if "." in s:
-        sec, ms = s.split(".")
-        sec = int(sec)
-        ms = int(ms)
-    else:
-        sec = int(s)
-        ms = 0
 
-    total_ms = (h * 3600 + m * 60 + sec) * 1000 + ms
-    return total_ms
+def _iter_cues(content: str) -> Iterator[Dict[str, object]]:
+    """Yield an utterance for every cue in a chunk of VTT text."""
+    for m in _CUE_RE.finditer(content):
+        (sh, sm, ss, sf, eh, em, es, ef,
+         voice, voice_text, named, named_text, bare) = m.groups()
+
+        # Extract speaker (format: "<v Speaker Name>text" or "Speaker Name: text")
+        if voice is not None:
+            speaker, text = voice.strip(), voice_text.strip()
+        elif named is not None:
+            speaker, text = named.strip(), named_text.strip()
+        else:
+            speaker, text = "Unknown", bare.strip()
+
+        # Clean up speaker name
+        if not speaker or speaker.lower() == "unknown":
+            speaker = "Speaker ?"
+
+        if text:
+            yield {
+                # Timestamps come pre-split by the regex; no string splitting
+                "start_ms": ((int(sh or 0) * 60 + int(sm)) * 60 + int(ss)) * 1000 + int(sf or 0),
+                "end_ms": ((int(eh or 0) * 60 + int(em)) * 60 + int(es)) * 1000 + int(ef or 0),
+                "speaker": speaker,
+                "text": text
+            }
 
 
 def parse_vtt(content: str) -> List[Dict[str, object]]:
@@ -43,79 +53,49 @@ def parse_vtt(content: str) -> List[Dict[str, object]]:
     Returns:
         List[Dict] with keys: start_ms, end_ms, speaker, text
     """
-    utterances: List[Dict[str, object]] = []
+    # Skip header
+    header = content.find("WEBVTT")
+    if header == -1:
+        return []
 
-    lines = content.split("\n")
-    i = 0
-    n = len(lines)
+    return list(_iter_cues(content[header:]))
+
+
+def iter_parse_vtt(lines: Iterable[str]) -> Iterator[Dict[str, object]]:
+    """
+    Lazily parse VTT lines (e.g. an open file) into utterances.
+
+    Cues are parsed one blank-line-separated block at a time, so the whole
+    transcript never has to be held in memory and callers can start
+    consuming utterances while the file is still being read.
+
+    Yields:
+        Dict with keys: start_ms, end_ms, speaker, text
+    """
+    lines = iter(lines)
 
     # Skip header
-    while i < n and not lines[i].strip().startswith("WEBVTT"):
-        i += 1
-    if i < n:
-        i += 1  # skip WEBVTT line
-
-    while i < n:
-        line = lines[i].strip()
-
-        # Skip empty lines and NOTE lines
-        if not line or line.startswith("NOTE"):
-            i += 1
-            continue
-
-        # Check if this is a timestamp line (contains -->)
-        if "-->" in line:
-            # Parse timestamp
-            timestamp_match = re.match(r"([\d:\.]+)\s*-->\s*([\d:\.]+)", line)
-            if timestamp_match:
-                start_str = timestamp_match.group(1)
-                end_str = timestamp_match.group(2)
-                start_ms = parse_timestamp(start_str)
-                end_ms = parse_timestamp(end_str)
-
-                # Next line should be speaker and text
-                i += 1
-                if i < n:
-                    text_line = lines[i].strip()
-
-                    # Extract speaker (format: "<v Speaker Name>text" or "Speaker Name: text")
-                    speaker = "Unknown"
-                    text = text_line
-
-                    # Try <v Speaker> format
-                    voice_match = re.match(r"<v\s+([^>]+)>(.*)", text_line)
-                    if voice_match:
-                        speaker = voice_match.group(1).strip()
-                        text = voice_match.group(2).strip()
-                    else:
-                        # Try "Speaker: text" format
-                        colon_match = re.match(r"([^:]+):\s*(.*)", text_line)
-                        if colon_match:
-                            speaker = colon_match.group(1).strip()
-                            text = colon_match.group(2).strip()
-
-                    # Clean up speaker name
-                    if not speaker or speaker.lower() == "unknown":
-                        speaker = "Speaker ?"
-
-                    # Add utterance
-                    if text:
-                        utterances.append({
-                            "start_ms": start_ms,
-                            "end_ms": end_ms,
-                            "speaker": speaker,
-                            "text": text
-                        })
-
-        i += 1
-
-    return utterances
+    for line in lines:
+        # lstrip("\ufeff"): some Teams exports start with a UTF-8 BOM
+        if line.lstrip("\ufeff").strip().startswith("WEBVTT"):
+            break
+    else:
+        return
+
+    block: List[str] = []
+    for line in lines:
+        if line.strip():
+            block.append(line.rstrip("\r\n"))
+        elif block:
+            yield from _iter_cues("\n".join(block))
+            block = []
+    if block:
+        yield from _iter_cues("\n".join(block))
 
 
 def parse_vtt_file(file_path: str) -> List[Dict[str, object]]:
     """
-    Parse VTT file from file path.
+    Parse VTT file from file path, streaming it line by line.
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    return parse_vtt(content)
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        return list(iter_parse_vtt(f))